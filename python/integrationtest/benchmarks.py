@@ -0,0 +1,303 @@
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import pathlib
+import random
+import tempfile
+import time
+
+import numpy
+
+import integrationtest.log_file_checks as log_file_checks
+
+# 18-Oct-2026: benchmarks for the log-file and data-file checks.  Synthetic drunc-style
+# log files (with a configurable number of lines and fraction of problem lines) and
+# synthetic HDF5 files (with the TriggerRecord/RawData layout and the file Attributes
+# that the checks look for, at a configurable number of records and fragments) are
+# generated in a work directory, each check is timed on them, and the throughput is
+# compared with a baseline that was saved earlier on the same machine.  For example
+#   python -m integrationtest.benchmarks --baseline ~/checker_baseline.json --update-baseline
+#   (change the checks)
+#   python -m integrationtest.benchmarks --baseline ~/checker_baseline.json
+# The synthetic data file has the filelayout_params of the record and dataset names that
+# it uses, and a TriggerRecordHeader and a Fragment header (in the daqdataformats binary
+# layout) at the start of each dataset, so that hdf5libs can find the SourceIDs and
+# fragment types of the fragments, and the fragment checks are really made on it.  The
+# benchmark fails if any check raises an exception or does not pass on the synthetic
+# file.  Real data files (e.g. from an earlier integration test) can be added with
+# --data-file; checks that raise an exception on those are reported as skipped.
+
+_severities = ("DEBUG", "INFO", "INFO", "INFO", "WARNING", "ERROR")
+# daqdataformats binary layouts (FragmentHeader version 5, TriggerRecordHeaderData
+# version 4, ComponentRequest version 2, SourceID version 2)
+_source_id_fields = [("source_id_version", "<u2"), ("subsystem", "<u2"), ("id", "<u4")]
+_fragment_header_dtype = numpy.dtype([
+    ("fragment_header_marker", "<u4"), ("version", "<u4"), ("size", "<u8"),
+    ("trigger_number", "<u8"), ("trigger_timestamp", "<u8"), ("window_begin", "<u8"), ("window_end", "<u8"),
+    ("run_number", "<u4"), ("error_bits", "<u4"), ("fragment_type", "<u4"),
+    ("sequence_number", "<u2"), ("detector_id", "<u2"),
+] + _source_id_fields)
+_trigger_record_header_dtype = numpy.dtype([
+    ("trigger_record_header_marker", "<u4"), ("version", "<u4"),
+    ("trigger_number", "<u8"), ("trigger_timestamp", "<u8"), ("num_requested_components", "<u8"),
+    ("run_number", "<u4"), ("error_bits", "<u4"),
+    ("trigger_type", "<u2"), ("sequence_number", "<u2"), ("max_sequence_number", "<u2"), ("unused", "<u2"),
+] + _source_id_fields)
+_component_request_dtype = numpy.dtype([("version", "<u4"), ("unused", "<u4")] + _source_id_fields + [("window_begin", "<u8"), ("window_end", "<u8")])
+_subsystem_detector_readout = 1
+_subsystem_tr_builder = 4
+_fragment_type_wibeth = 12
+_detector_id_hd_tpc = 3
+_file_layout_params = {
+    "record_name_prefix": "TriggerRecord",
+    "digits_for_record_number": 5,
+    "digits_for_sequence_number": 4,
+    "record_header_dataset_name": "TriggerRecordHeader",
+    "raw_data_group_name": "RawData",
+    "view_group_name": "Views",
+    "path_param_list": [
+        {"detector_group_type": "Detector_Readout", "detector_group_name": "HD_TPC", "element_name_prefix": "Link", "digits_for_element_number": 5},
+    ],
+}
+
+_log_messages = (
+    "Sent 128 TriggerDecisions to DFO",
+    "Received TimeSync message from readout application",
+    "DataWriter wrote record 42 to file",
+    "Connection to endpoint established",
+    "Queue occupancy is 12 of 1000",
+)
+
+
+def generate_log_file(path, n_lines, problem_fraction=0.001, seed=0):
+    "Write a drunc-style log file with n_lines lines, of which about problem_fraction are warnings or errors"
+    rng = random.Random(seed)
+    start = datetime.datetime(2026, 10, 18, 12, 0, 0)
+    with open(path, "w") as log_file:
+        for line_number in range(n_lines):
+            timestamp = start + datetime.timedelta(milliseconds=line_number)
+            if rng.random() < problem_fraction:
+                severity = rng.choice(("WARNING", "ERROR"))
+                message = "Fragment was not received in time, error count is 1"
+            else:
+                severity = rng.choice(_severities[:4])
+                message = rng.choice(_log_messages)
+            log_file.write(f"{timestamp.strftime('%Y-%b-%d %H:%M:%S')},{timestamp.microsecond // 1000:03d} {severity} [dunedaq::app::Module::method at Module.cpp:{line_number % 500}] {message}\n")
+    return path
+
+
+def generate_data_file(directory, n_records, n_fragments, fragment_size, run_number=1, file_index=0, op_env="benchmark"):
+    """Write an HDF5 file with n_records records, each with a TriggerRecordHeader and
+    n_fragments WIBEth fragments of fragment_size bytes (including the fragment header),
+    plus the file Attributes that check_file_attributes expects, and return its path"""
+    import h5py
+
+    creation_time = datetime.datetime(2026, 10, 18, 12, 0, 0, tzinfo=datetime.timezone.utc)
+    path = pathlib.Path(directory) / f"{op_env}_raw_run{run_number:06d}_{file_index:04d}_dataflow0_datawriter_0_{creation_time.strftime('%Y%m%dT%H%M%S')}.hdf5"
+    fragment_size = max(fragment_size, _fragment_header_dtype.itemsize)
+    fragment = numpy.zeros(fragment_size, dtype=numpy.uint8)
+    fragment_header = fragment[:_fragment_header_dtype.itemsize].view(_fragment_header_dtype)[0]
+    record_header = numpy.zeros(_trigger_record_header_dtype.itemsize + n_fragments * _component_request_dtype.itemsize, dtype=numpy.uint8)
+    trigger_record_header = record_header[:_trigger_record_header_dtype.itemsize].view(_trigger_record_header_dtype)[0]
+    component_requests = record_header[_trigger_record_header_dtype.itemsize:].view(_component_request_dtype)
+    trigger_record_header["trigger_record_header_marker"] = 0x33334444
+    trigger_record_header["version"] = 4
+    trigger_record_header["num_requested_components"] = n_fragments
+    trigger_record_header["run_number"] = run_number
+    trigger_record_header["source_id_version"] = 2
+    trigger_record_header["subsystem"] = _subsystem_tr_builder
+    trigger_record_header["id"] = 0
+    component_requests["version"] = 2
+    component_requests["source_id_version"] = 2
+    component_requests["subsystem"] = _subsystem_detector_readout
+    component_requests["id"] = numpy.arange(n_fragments)
+    fragment_header["fragment_header_marker"] = 0x11112222
+    fragment_header["version"] = 5
+    fragment_header["size"] = fragment_size
+    fragment_header["run_number"] = run_number
+    fragment_header["fragment_type"] = _fragment_type_wibeth
+    fragment_header["detector_id"] = _detector_id_hd_tpc
+    fragment_header["source_id_version"] = 2
+    fragment_header["subsystem"] = _subsystem_detector_readout
+    with h5py.File(path, "w") as h5file:
+        for record_number in range(1, n_records + 1):
+            timestamp = 1000000 + 62500 * record_number
+            trigger_record_header["trigger_number"] = record_number
+            trigger_record_header["trigger_timestamp"] = timestamp
+            component_requests["window_begin"] = timestamp - 1000
+            component_requests["window_end"] = timestamp + 1000
+            raw_data = h5file.create_group(f"TriggerRecord{record_number:05d}.0000/RawData")
+            raw_data.create_dataset(f"TR_Builder_0x{0:08x}_TriggerRecordHeader", data=record_header)
+            fragment_header["trigger_number"] = record_number
+            fragment_header["trigger_timestamp"] = timestamp
+            fragment_header["window_begin"] = timestamp - 1000
+            fragment_header["window_end"] = timestamp + 1000
+            for fragment_number in range(n_fragments):
+                fragment_header["id"] = fragment_number
+                raw_data.create_dataset(f"Detector_Readout_0x{fragment_number:08x}_WIBEth", data=fragment)
+        attributes = {
+            "application_name": "dataflow0",
+            "closing_timestamp": int(creation_time.timestamp() * 1000) + 1000,
+            "creation_timestamp": int(creation_time.timestamp() * 1000),
+            "file_index": file_index,
+            "filelayout_params": json.dumps(_file_layout_params),
+            "filelayout_version": 6,
+            "offline_data_stream": "cosmics",
+            "operational_environment": op_env,
+            "record_type": "TriggerRecord",
+            "recorded_size": n_records * (n_fragments * fragment_size + len(record_header)),
+            "run_number": run_number,
+            "run_was_for_test_purposes": "true",
+            "source_id_geo_id_map": "{}",
+        }
+        h5file.attrs.update(attributes)
+    return path
+
+
+def time_call(function, *args, repeat=3):
+    "The shortest time, in seconds, of repeat calls of function(*args), with its printout suppressed"
+    best_time = None
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start_time = time.perf_counter()
+            function(*args)
+            elapsed_time = time.perf_counter() - start_time
+        if best_time is None or elapsed_time < best_time:
+            best_time = elapsed_time
+    return best_time
+
+
+def _result(seconds, amount, unit):
+    return {"seconds": seconds, "throughput": amount / seconds if seconds > 0 else float("inf"), "unit": unit}
+
+
+def run_log_benchmarks(work_dir, n_lines, problem_fraction, n_files, repeat=3):
+    log_names = [generate_log_file(pathlib.Path(work_dir) / f"log_app{i}.txt", n_lines, problem_fraction, seed=i) for i in range(n_files)]
+    megabytes = os.path.getsize(log_names[0]) / 1e6
+    results = {}
+    seconds = time_call(log_file_checks.log_has_no_errors, log_names[0], repeat=repeat)
+    results["log_has_no_errors (lines/s)"] = _result(seconds, n_lines, "lines/s")
+    results["log_has_no_errors (MB/s)"] = _result(seconds, megabytes, "MB/s")
+    seconds = time_call(lambda: log_file_checks.log_has_no_errors(log_names[0], use_mmap=True), repeat=repeat)
+    results["log_has_no_errors mmap (MB/s)"] = _result(seconds, megabytes, "MB/s")
+    seconds = time_call(log_file_checks.logs_are_error_free, log_names, repeat=repeat)
+    results["logs_are_error_free (lines/s)"] = _result(seconds, n_lines * n_files, "lines/s")
+    return results
+
+
+def run_once(function):
+    "Call function once, and return its result and its printout"
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        result = function()
+    return (result, output.getvalue())
+
+
+def run_data_file_benchmarks(data_file_names, fragment_params, repeat=3, synthetic_file_names=()):
+    """Time the data-file checks on each file.  On the synthetic files, each check has to
+    pass (with its check-mark report line) before it is timed, so that a file that the
+    checks cannot evaluate does not give a meaningless result"""
+    import integrationtest.data_file_checks as data_file_checks
+
+    results = {}
+    for file_name in data_file_names:
+        base_name = os.path.basename(str(file_name))
+        with data_file_checks.DataFile(file_name) as datafile:
+            n_records = len(datafile.events)
+        benchmarks = [
+            ("sanity_check", data_file_checks.sanity_check, (), n_records, "records/s"),
+            ("check_file_attributes", data_file_checks.check_file_attributes, (), 1, "files/s"),
+            ("check_fragment_count", data_file_checks.check_fragment_count, (fragment_params,), n_records, "records/s"),
+            ("check_fragment_sizes", data_file_checks.check_fragment_sizes, (fragment_params,), n_records, "records/s"),
+            ("check_fragment_sizes", data_file_checks.check_fragment_sizes, (fragment_params,), os.path.getsize(file_name) / 1e6, "MB/s"),
+        ]
+        for (name, check_function, args, amount, unit) in benchmarks:
+            # a new DataFile for each call, so that nothing is reused from an earlier call
+            def run_check():
+                with data_file_checks.DataFile(file_name) as datafile:
+                    return check_function(datafile, *args)
+            if file_name in synthetic_file_names:
+                (passed, output) = run_once(run_check)
+                if passed is not True or "\N{WHITE HEAVY CHECK MARK}" not in output:
+                    raise RuntimeError(f"{name} was not evaluated on the synthetic file {base_name}:\n{output}")
+                results[f"{name} {base_name} ({unit})"] = _result(time_call(run_check, repeat=repeat), amount, unit)
+                continue
+            try:
+                seconds = time_call(run_check, repeat=repeat)
+            except Exception as err:
+                print(f"Skipping {name} on {base_name}: {type(err).__name__}: {err}")
+                continue
+            results[f"{name} {base_name} ({unit})"] = _result(seconds, amount, unit)
+    return results
+
+
+def compare_with_baseline(results, baseline, tolerance):
+    "Print the results next to the baseline ones, and return whether none of them is more than tolerance (a fraction) slower"
+    all_ok = True
+    for (name, result) in results.items():
+        line = f"{name}: {result['throughput']:.4g} ({result['seconds']:.4f} s)"
+        if name not in baseline:
+            print(f"{line}, no baseline")
+            continue
+        ratio = result["throughput"] / baseline[name]["throughput"]
+        if ratio < 1.0 - tolerance:
+            all_ok = False
+            print(f"\N{POLICE CARS REVOLVING LIGHT} {line}, {ratio:.2f} times the baseline of {baseline[name]['throughput']:.4g} \N{POLICE CARS REVOLVING LIGHT}")
+        else:
+            print(f"\N{WHITE HEAVY CHECK MARK} {line}, {ratio:.2f} times the baseline of {baseline[name]['throughput']:.4g}")
+    return all_ok
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the integrationtest log-file and data-file checks")
+    parser.add_argument("--work-dir", type=pathlib.Path, default=None, help="Directory for the synthetic files (default is a temporary directory)")
+    parser.add_argument("--baseline", type=pathlib.Path, default=None, help="JSON file with the baseline results")
+    parser.add_argument("--update-baseline", action="store_true", help="Write the results to the --baseline file instead of comparing with it")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Fraction by which a throughput may fall below the baseline (default 0.2)")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of times that each check is run (the fastest is used)")
+    parser.add_argument("--log-lines", type=int, default=200000, help="Number of lines in each synthetic log file")
+    parser.add_argument("--log-problem-fraction", type=float, default=0.001, help="Fraction of warning and error lines in the synthetic log files")
+    parser.add_argument("--log-files", type=int, default=4, help="Number of synthetic log files checked by logs_are_error_free")
+    parser.add_argument("--records", type=int, default=100, help="Number of records in the synthetic data file")
+    parser.add_argument("--fragments", type=int, default=10, help="Number of detector fragments in each record of the synthetic data file")
+    parser.add_argument("--fragment-size", type=int, default=7272, help="Size, in bytes, of each synthetic fragment, including its 72-byte header")
+    parser.add_argument("--data-file", action="append", default=[], help="Repeatable, an existing data file to benchmark the data-file checks on as well")
+    parser.add_argument("--no-data-files", action="store_true", help="Only benchmark the log-file checks (e.g. when the HDF5 libraries are not available)")
+    args = parser.parse_args(argv)
+    if args.records < 1 or args.fragments < 1:
+        parser.error("--records and --fragments must be at least 1")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        work_dir = args.work_dir if args.work_dir is not None else pathlib.Path(temp_dir)
+        work_dir.mkdir(parents=True, exist_ok=True)
+        results = run_log_benchmarks(work_dir, args.log_lines, args.log_problem_fraction, args.log_files, args.repeat)
+        if not args.no_data_files:
+            synthetic_file_name = generate_data_file(work_dir, args.records, args.fragments, args.fragment_size)
+            data_file_names = [synthetic_file_name] + args.data_file
+            fragment_params = {
+                "fragment_type_description": "WIBEth",
+                "fragment_type": "WIBEth",
+                "expected_fragment_count": args.fragments,
+                "min_size_bytes": 0,
+                "max_size_bytes": 1 << 30,
+                "debug_mask": 0x0,
+            }
+            results.update(run_data_file_benchmarks(data_file_names, fragment_params, args.repeat, [synthetic_file_name]))
+
+    if args.baseline is not None and args.update_baseline:
+        with open(args.baseline, "w") as baseline_file:
+            json.dump(results, baseline_file, indent=2)
+        print(f"Wrote {len(results)} baseline results to {args.baseline}")
+        return 0
+    baseline = {}
+    if args.baseline is not None:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+    return 0 if compare_with_baseline(results, baseline, args.tolerance) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,147 @@
+import os
+import shutil
+import socket
+import subprocess
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+# 18-Oct-2026: the Connectivity Service (gunicorn running connection-flask) is started
+# once per port and shared by all of the runs that use that port, instead of being
+# started and killed around every run.  A newly-started service is only handed out
+# once its port accepts connections, so drunc never races against a service that is
+# still starting up.
+#
+# The output of each service goes to a log file in a directory of the pytest session,
+# and the part of it that was written during a run is copied into the run directory
+# when the run releases the service, so that it is checked with the run's other log
+# files.  On release, the registrations of the run's session are retracted, so that the
+# next run does not find them; if the service does not accept that, it is stopped, and
+# the next run that needs it starts a new one.
+
+
+class ConnectivityService:
+    def __init__(self, port, process, log_file, startup_latency):
+        self.port = port
+        self.process = process
+        self.log_file = log_file
+        # size of the log file when the service was given to the current run
+        self.run_log_offset = 0
+        # seconds between starting the process and its port accepting connections
+        self.startup_latency = startup_latency
+        # number of runs that have been given this service
+        self.use_count = 0
+
+    def is_running(self):
+        return self.process.poll() is None
+
+    def log_size(self):
+        return os.path.getsize(self.log_file.name)
+
+    def copy_run_log(self, run_log_path):
+        "Copy the part of the log that was written since the service was given to the current run"
+        with open(self.log_file.name, "rb") as service_log, open(run_log_path, "wb") as run_log:
+            service_log.seek(self.run_log_offset)
+            shutil.copyfileobj(service_log, run_log)
+
+    def retract_session(self, session, timeout=5.0):
+        "Remove the registrations of a session from the service, and return whether that worked"
+        request = urllib.request.Request(
+            f"http://localhost:{self.port}/retract-partition",
+            data=urllib.parse.urlencode({"partition": session}).encode(),
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                return 200 <= response.status < 300
+        except (urllib.error.URLError, OSError):
+            return False
+
+    def stop(self):
+        if self.is_running():
+            self.process.send_signal(2)
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+        self.log_file.close()
+
+
+def wait_until_ready(port, process, timeout, host="localhost"):
+    """Wait until a connection can be made to the given port, giving up when the
+    process exits or the timeout (in seconds) expires. Returns whether the port is ready
+
+    """
+    deadline = time.monotonic() + timeout
+    while process.poll() is None:
+        try:
+            with socket.create_connection((host, port), timeout=0.5):
+                return True
+        except OSError:
+            if time.monotonic() > deadline:
+                return False
+            time.sleep(0.05)
+    return False
+
+
+class ConnectivityServicePool:
+    def __init__(self, log_dir, startup_timeout=60.0):
+        self.log_dir = log_dir
+        self.startup_timeout = startup_timeout
+        self._services = {}
+
+    def get(self, port, debug_level):
+        """Return a running, ready ConnectivityService for the given port, starting
+        one if there isn't one already. A RuntimeError is raised if the service doesn't
+        become ready in time
+
+        """
+        service = self._services.get(port)
+        if service is not None and not service.is_running():
+            # e.g. stopped by the killall of an earlier run's cleanup
+            service.stop()
+            service = None
+        if service is None:
+            service = self._start(port, debug_level, os.path.join(self.log_dir, f"connectivity-service_{port}.log"))
+            self._services[port] = service
+        service.use_count += 1
+        service.run_log_offset = service.log_size()
+        return service
+
+    def release(self, service, session, run_log_path):
+        """Called when a run has finished with a service: copies the run's part of the
+        service log to run_log_path, and clears the session's registrations (or stops
+        the service, if that can't be done)"""
+        service.copy_run_log(run_log_path)
+        if service.is_running() and not service.retract_session(session):
+            print(f"Stopping the Connectivity Service on port {service.port}, since the registrations of session {session} could not be retracted")
+            service.stop()
+            if self._services.get(service.port) is service:
+                del self._services[service.port]
+
+    def _start(self, port, debug_level, log_path):
+        print(f"Starting Connectivity Service on port {port}")
+        connsvc_env = os.environ.copy()
+        connsvc_env["CONNECTION_FLASK_DEBUG"] = str(debug_level)
+        log_file = open(log_path, "a")
+        start_time = time.perf_counter()
+        process = subprocess.Popen(
+            f"gunicorn -b 0.0.0.0:{port} --workers=1 --worker-class=gthread --threads=2 --timeout 5000000000 --log-level=info connection-service.connection-flask:app".split(),
+            stdout=log_file,
+            stderr=log_file,
+            env=connsvc_env,
+        )
+        if not wait_until_ready(port, process, self.startup_timeout):
+            ConnectivityService(port, process, log_file, None).stop()
+            raise RuntimeError(
+                f"The Connectivity Service on port {port} did not become ready within {self.startup_timeout} s (see {log_path})"
+            )
+        startup_latency = time.perf_counter() - start_time
+        print(f"Connectivity Service on port {port} was ready after {startup_latency:.2f} s")
+        return ConnectivityService(port, process, log_file, startup_latency)
+
+    def stop_all(self):
+        for service in self._services.values():
+            service.stop()
+        self._services.clear()
@@ -1,4 +1,8 @@
+import pathlib
+import subprocess
 from dataclasses import dataclass, field
+from typing import Any
+from integrationtest.timeline import PhaseTimeline
 
 
 @dataclass
@@ -46,3 +50,37 @@ class CreateConfigResult:
     log_file: str
     data_dirs: list[str]
     tpstream_data_dirs: list[str]
+    # UIDs of the session's applications of each class in data_writer_app_classes,
+    # e.g. apps_by_class["DFApplication"]
+    apps_by_class: dict[str, list[str]] = field(default_factory=dict)
+    # number of runs that have used this configuration
+    run_count: int = 0
+    # the time taken by each phase of making the configuration
+    timeline: PhaseTimeline = None
+
+
+@dataclass(slots=True, frozen=True)
+class FileStat:
+    size: int
+    mtime: float
+
+
+@dataclass(slots=True)
+class RunResult:
+    completed_process: subprocess.CompletedProcess = None
+    confgen_config: drunc_config = None
+    session: str = ""
+    nanorc_commands: list[str] = field(default_factory=list)
+    run_dir: pathlib.Path = None
+    config_dir: pathlib.Path = None
+    # output files, sorted by run number and file index (data) or by name (logs, opmon)
+    data_files: list[pathlib.Path] = field(default_factory=list)
+    tpset_files: list[pathlib.Path] = field(default_factory=list)
+    log_files: list[pathlib.Path] = field(default_factory=list)
+    opmon_files: list[pathlib.Path] = field(default_factory=list)
+    # the size and modification time of each of the output files, when they were found
+    file_stats: dict[pathlib.Path, FileStat] = field(default_factory=dict)
+    connectivity_service: Any = None
+    log_watcher: Any = None
+    data_file_watcher: Any = None
+    timeline: PhaseTimeline = None
@@ -0,0 +1,132 @@
+import os
+import pathlib
+import shutil
+import socket
+import threading
+import time
+import uuid
+
+# 18-Oct-2026: each run writes its data into a new subdirectory of the configured
+# data-writer directory, so that it never sees (or has to move aside) the files of
+# earlier tests.  Subdirectories that are left over from earlier test sessions are
+# removed by a background janitor thread, so that run setup does not depend on how
+# many files the shared directories contain.
+#
+# The subdirectories are made with the usual permissions (not the 0700 of mkdtemp), so
+# that they can be used on shared data disks, and each one has an owner file with the
+# host name and process ID of the test session that made it.  The janitor only removes
+# a subdirectory of another session when that session is no longer running (for one on
+# the same host), or when nothing in it has been modified for max_age (for one from
+# another host, or without an owner file), so that the data of a session that is still
+# writing, e.g. a long soak test, is never removed.
+
+isolated_data_dir_prefix = "integtest-data-"
+_owner_file_name = ".integtest-owner"
+
+
+def make_isolated_data_dir(data_dir):
+    """Create a new, uniquely-named subdirectory of data_dir (or, if data_dir is
+    itself such a subdirectory, of its parent) and return its path
+
+    """
+    base_dir = pathlib.Path(data_dir)
+    if base_dir.name.startswith(isolated_data_dir_prefix):
+        base_dir = base_dir.parent
+    base_dir.mkdir(parents=True, exist_ok=True)
+    while True:
+        isolated_data_dir = base_dir / f"{isolated_data_dir_prefix}{uuid.uuid4().hex[:12]}"
+        try:
+            os.makedirs(isolated_data_dir)
+            break
+        except FileExistsError:
+            continue
+    with open(isolated_data_dir / _owner_file_name, "w") as owner_file:
+        owner_file.write(f"{socket.gethostname()} {os.getpid()}\n")
+    return str(isolated_data_dir)
+
+
+def _is_abandoned(isolated_data_dir, oldest_time):
+    "Whether a subdirectory made by another test session is no longer being written to"
+    try:
+        with open(os.path.join(isolated_data_dir, _owner_file_name)) as owner_file:
+            (host_name, pid) = owner_file.read().split()
+        if host_name == socket.gethostname():
+            return not _process_is_running(int(pid))
+    except (OSError, ValueError):
+        pass
+    newest_time = os.stat(isolated_data_dir).st_mtime
+    with os.scandir(isolated_data_dir) as entries:
+        for entry in entries:
+            newest_time = max(newest_time, entry.stat(follow_symlinks=False).st_mtime)
+    return newest_time <= oldest_time
+
+
+def _process_is_running(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class DataDirectoryJanitor(threading.Thread):
+    def __init__(self, max_age=3600, poll_interval=60.0):
+        super().__init__(name="DataDirectoryJanitor", daemon=True)
+        self.max_age = max_age
+        self.poll_interval = poll_interval
+        self._base_dirs = set()
+        self._own_dirs = set()
+        self._lock = threading.Lock()
+        self._wake_event = threading.Event()
+        self._stop_event = threading.Event()
+
+    def add(self, isolated_data_dir):
+        """Register a subdirectory made by make_isolated_data_dir, whose parent is then
+        cleaned (the subdirectory itself is never removed by this janitor)"""
+        isolated_data_dir = pathlib.Path(isolated_data_dir)
+        with self._lock:
+            self._own_dirs.add(isolated_data_dir)
+            if isolated_data_dir.parent not in self._base_dirs:
+                self._base_dirs.add(isolated_data_dir.parent)
+                self._wake_event.set()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            self.clean()
+            self._wake_event.wait(self.poll_interval)
+            self._wake_event.clear()
+
+    def stop(self):
+        self._stop_event.set()
+        self._wake_event.set()
+        if self.is_alive():
+            self.join()
+
+    def clean(self):
+        """Remove the subdirectories of test sessions that have finished (and files from
+        older versions of the framework) that are older than max_age"""
+        with self._lock:
+            base_dirs = list(self._base_dirs)
+            own_dirs = set(self._own_dirs)
+        oldest_time = time.time() - self.max_age
+        for base_dir in base_dirs:
+            try:
+                entries = list(os.scandir(base_dir))
+            except OSError:
+                continue
+            for entry in entries:
+                try:
+                    if entry.stat(follow_symlinks=False).st_mtime > oldest_time:
+                        continue
+                    if entry.name.startswith(isolated_data_dir_prefix) and entry.is_dir(follow_symlinks=False):
+                        if pathlib.Path(entry.path) not in own_dirs and _is_abandoned(entry.path, oldest_time):
+                            print(f"Deleting data directory from earlier test: {entry.path}", flush=True)
+                            shutil.rmtree(entry.path, ignore_errors=True)
+                    elif entry.name.endswith(".hdf5.temp_saved") and entry.is_file(follow_symlinks=False):
+                        print(f"Deleting data file from earlier test: {entry.path}", flush=True)
+                        os.unlink(entry.path)
+                except OSError:
+                    # e.g. removed by another test session in the meantime
+                    pass
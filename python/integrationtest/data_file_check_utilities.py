@@ -2,6 +2,7 @@ from hdf5libs import HDF5RawDataFile
 import daqdataformats
 import trgdataformats
 from num2words import num2words
+import numbers
 
 def get_TC_type(h5_file, record_id):
     src_ids = h5_file.get_source_ids_for_fragment_type(record_id, 'Trigger_Candidate')
@@ -32,6 +33,55 @@ def get_record_ordinal_strings(record_id, full_record_list):
         pass
     return ordinal_strings
 
+# 18-Oct-2026: RecordOrdinalTable gives the same answers as get_record_ordinal_strings,
+# but the position of each record is looked up in a dictionary that is built once per
+# record list, and, when the set of ordinal keys that the caller is interested in is
+# given (e.g. the keys of frag_counts_by_record_ordinal), ordinal words are only
+# produced for those keys.  Other positions are given a placeholder string ("#<n>")
+# that can't match an ordinal key, which is all that the limit lookups need.
+class RecordOrdinalTable:
+    def __init__(self, full_record_list, ordinal_keys=None):
+        self.record_count = len(full_record_list)
+        self.positions = {}
+        for index, record_id in enumerate(full_record_list):
+            self.positions.setdefault(record_id, index)
+        self._ordinal_words = {}
+        self._all_words = ordinal_keys is None
+        if not self._all_words:
+            wanted = set(ordinal_keys) - {"default", "last", "penultimate"}
+            index = 0
+            while len(wanted) > 0 and index < self.record_count:
+                word = num2words(index+1, lang='en', to='ordinal')
+                if word in wanted:
+                    self._ordinal_words[index] = word
+                    wanted.discard(word)
+                index += 1
+
+    def _ordinal_word(self, index):
+        if index not in self._ordinal_words:
+            if not self._all_words:
+                return f"#{index+1}"
+            self._ordinal_words[index] = num2words(index+1, lang='en', to='ordinal')
+        return self._ordinal_words[index]
+
+    def get_strings(self, record_id):
+        ordinal_strings = []
+        index = self.positions.get(record_id)
+        if index is None:
+            return ordinal_strings
+        ordinal_strings.append(self._ordinal_word(index))
+        if index == (self.record_count-1):
+            if index != 0:
+                ordinal_strings.insert(0, "last")
+            else:
+                ordinal_strings.append("last")
+        if self.record_count > 1 and index == (self.record_count-2):
+            if index >= 2:
+                ordinal_strings.insert(0, "penultimate")
+            else:
+                ordinal_strings.append("penultimate")
+        return ordinal_strings
+
 def get_fragment_count_limits(params, tc_type_string, record_ordinal_strings):
     # set absurd initial values that will indicate a problem in what the user specified
     min_count = 9999999
@@ -127,6 +177,105 @@ def get_fragment_size_limits(params, tc_type_string, record_ordinal_strings):
 
     return [min_size, max_size]
 
+# 18-Oct-2026: FragmentLimitResolver compiles the count or size parameters of a
+# data-file check into lookup tables once, and memoizes the resolved limits by TC type
+# and record ordinal, since those are the only things that the limits depend on.  The
+# lookup order is the same as in get_fragment_count_limits and get_fragment_size_limits
+# (top-level values, then by TC type, then by record ordinal, with later ones winning).
+#
+# The parameters are validated when the resolver is created, and any problems are listed
+# in the 'problems' attribute, so that they can be reported before any data is read.
+# If a record is found for which no minimum or maximum has been specified at all, a
+# description of that is added to 'problems' when the limits for that record are looked
+# up, and the usual absurd values (9999999 and 0) are returned.
+class FragmentLimitResolver:
+    _schemas = {
+        "count": (('expected_fragment_count', 'expected_fragment_count'), 'frag_counts_by_TC_type',
+                  'frag_counts_by_record_ordinal', ('min_count', 'max_count')),
+        "size": (('min_size_bytes', 'max_size_bytes'), 'frag_sizes_by_TC_type',
+                 'frag_sizes_by_record_ordinal', ('min_size_bytes', 'max_size_bytes')),
+    }
+
+    def __init__(self, params, limit_kind):
+        (top_level_keys, tc_type_key, ordinal_key, self._limit_keys) = self._schemas[limit_kind]
+        self.limit_kind = limit_kind
+        self.description = params.get('fragment_type_description', params.get('fragment_type', 'unknown'))
+        self.problems = []
+        self.reported_problem_count = 0
+        self._memo = {}
+
+        for required_key in ('fragment_type', 'fragment_type_description'):
+            if required_key not in params:
+                self.problems.append(f"Required parameter '{required_key}' is missing from the {self.description} fragment parameters")
+        self._top_level = self._compile_limits(params, top_level_keys, "the top level")
+        self._by_tc_type = self._compile_table(params, tc_type_key)
+        self._by_ordinal = self._compile_table(params, ordinal_key)
+
+        if len(self._by_tc_type) == 0 and len(self._by_ordinal) == 0:
+            for (limit, name) in zip(self._top_level, top_level_keys):
+                if limit is None:
+                    self.problems.append(f"No {limit_kind} limit has been specified for {self.description} fragments (parameter '{name}', '{tc_type_key}', or '{ordinal_key}' is needed)")
+                    break
+
+    def _compile_limits(self, limit_dict, keys, where):
+        for key in dict.fromkeys(keys):
+            value = limit_dict.get(key)
+            # numpy integers and floats are accepted, as they were before the validation
+            if value is not None and (isinstance(value, bool) or not isinstance(value, numbers.Real) or not value >= 0):
+                self.problems.append(f"The value of '{key}' in {where} of the {self.description} fragment parameters should be a non-negative number, not {value!r}")
+        limits = [limit_dict.get(key) for key in keys]
+        if limits[0] is not None and limits[1] is not None and limits[0] > limits[1]:
+            self.problems.append(f"The {self.limit_kind} limits in {where} of the {self.description} fragment parameters have a minimum ({limits[0]}) that is larger than the maximum ({limits[1]})")
+        return tuple(limits)
+
+    def _compile_table(self, params, table_key):
+        table = {}
+        if table_key not in params:
+            return table
+        if not isinstance(params[table_key], dict):
+            self.problems.append(f"Parameter '{table_key}' of the {self.description} fragment parameters should be a dictionary")
+            return table
+        for (entry_key, limit_dict) in params[table_key].items():
+            where = f"'{table_key}' entry '{entry_key}'"
+            if not isinstance(limit_dict, dict):
+                self.problems.append(f"The {where} of the {self.description} fragment parameters should be a dictionary")
+                continue
+            for unknown_key in set(limit_dict.keys()) - set(self._limit_keys):
+                self.problems.append(f"Unknown key '{unknown_key}' in {where} of the {self.description} fragment parameters (expected {self._limit_keys})")
+            table[entry_key] = self._compile_limits(limit_dict, self._limit_keys, where)
+        return table
+
+    def get_limits(self, tc_type_string, record_ordinal_strings):
+        rno_string = record_ordinal_strings[0] if len(record_ordinal_strings) > 0 else None
+        # the memo is keyed by the entries of the tables that apply, so that all of the
+        # records that use the same entries share one set of limits
+        tc_type_key = self._table_key(self._by_tc_type, tc_type_string)
+        ordinal_key = None if rno_string is None else self._table_key(self._by_ordinal, rno_string)
+        memo_key = (tc_type_key, ordinal_key)
+        if memo_key not in self._memo:
+            self._memo[memo_key] = self._resolve(tc_type_key, ordinal_key, tc_type_string, rno_string)
+        return self._memo[memo_key]
+
+    @staticmethod
+    def _table_key(table, key):
+        if key in table:
+            return key
+        if 'default' in table:
+            return 'default'
+        return None
+
+    def _resolve(self, tc_type_key, ordinal_key, tc_type_string, rno_string):
+        limits = list(self._top_level)
+        overrides = [self._by_tc_type.get(tc_type_key), self._by_ordinal.get(ordinal_key)]
+        for override in overrides:
+            if override is not None:
+                limits = [new if new is not None else old for (new, old) in zip(override, limits)]
+        for (index, (limit, name, absurd_value)) in enumerate(zip(limits, self._limit_keys, (9999999, 0))):
+            if limit is None:
+                self.problems.append(f"No '{name}' value applies to {self.description} fragments in records with TC type {tc_type_string} and record ordinal {rno_string} (or in other records that use the same parameters)")
+                limits[index] = absurd_value
+        return limits
+
 def record_ordinal_string_all_tests():
     record_ordinal_string_test01()
     record_ordinal_string_test02()
@@ -135,6 +284,7 @@ def record_ordinal_string_all_tests():
     record_ordinal_string_test05()
     record_ordinal_string_test06()
     record_ordinal_string_test07()
+    record_ordinal_table_test01()
 
 def record_ordinal_string_test01():
     test_list = [999]
@@ -260,3 +410,16 @@ def record_ordinal_string_test07():
     ord_strings = get_record_ordinal_strings(requested_value, test_list)
     if len(ord_strings) != 0:
         print(f'\N{POLICE CARS REVOLVING LIGHT} UNIT TEST FAILURE: test_list={test_list} value={requested_value} ordinal_strings={ord_strings}')
+
+def record_ordinal_table_test01():
+    for test_list in ([999], [888, 999], [777, 888, 999], [666, 777, 888, 999], [111, 222, 333, 444, 555, 666, 777, 888, 999]):
+        full_table = RecordOrdinalTable(test_list)
+        keyed_table = RecordOrdinalTable(test_list, ["first", "third", "last", "default"])
+        for requested_value in test_list + [123]:
+            ord_strings = get_record_ordinal_strings(requested_value, test_list)
+            if full_table.get_strings(requested_value) != ord_strings:
+                print(f'\N{POLICE CARS REVOLVING LIGHT} UNIT TEST FAILURE: test_list={test_list} value={requested_value} ordinal_strings={ord_strings} table_strings={full_table.get_strings(requested_value)}')
+            keyed_strings = keyed_table.get_strings(requested_value)
+            if len(keyed_strings) != len(ord_strings) or \
+               any(k != o and (o in ("first", "third") or not k.startswith("#")) for (k, o) in zip(keyed_strings, ord_strings)):
+                print(f'\N{POLICE CARS REVOLVING LIGHT} UNIT TEST FAILURE: test_list={test_list} value={requested_value} ordinal_strings={ord_strings} keyed_table_strings={keyed_strings}')
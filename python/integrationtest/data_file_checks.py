@@ -1,37 +1,266 @@
+import collections
+import concurrent.futures
+import contextlib
 import datetime
 import h5py
-import os.path
+import io
+import multiprocessing
+import os
+import numpy
+import pathlib
 import re
+import sys
+import threading
+import weakref
 from hdf5libs import HDF5RawDataFile
 from integrationtest.data_file_check_utilities import (
     get_TC_type,
-    get_record_ordinal_strings,
-    get_fragment_count_limits,
-    get_fragment_size_limits,
+    RecordOrdinalTable,
+    FragmentLimitResolver,
     record_ordinal_string_all_tests,
 )
 
+RecordSummary = collections.namedtuple("RecordSummary", ["header_count", "fragment_count"])
+
+# The record-ordinal unit tests are only run by the first sanity_check in a session
+_ordinal_self_tests_done = False
+
+# Default number of worker processes used by check_data_files.  None means the value of
+# the --data-file-check-workers pytest option, which is read when it is first needed
+# (the plugin doesn't import this module, since it brings in the HDF5 libraries)
+data_file_check_workers = None
+
+def _pytest_option(name, default):
+    "The value of one of the plugin's pytest options, or default when not run by pytest"
+    plugin = sys.modules.get("integrationtest.integrationtest_commandline")
+    config = getattr(plugin, "pytest_config", None)
+    return default if config is None else config.getoption(name)
+
+def _default_worker_count():
+    if data_file_check_workers is not None:
+        return data_file_check_workers
+    return _pytest_option("--data-file-check-workers", 1)
+
+# 18-Oct-2026: open HDF5 files are shared through a least-recently-used pool with a
+# bounded size, so that validating many files does not exhaust file descriptors or
+# HDF5 chunk caches, while repeated checks of the same file still find it open.  A
+# handle that is evicted from the pool is closed, and it is simply reopened if it is
+# needed again.  The pool size is max_open_files or, if that is None, the value of the
+# --max-open-data-files pytest option (it is never less than 2, since a DataFile uses
+# both an h5py and an HDF5RawDataFile handle).
+#
+# Each DataFile pins the handles that it has used until it is closed (or garbage
+# collected), and pinned handles are never evicted, so the pool can be larger than its
+# size while many DataFiles are open at once.  The pool is used from several threads
+# (e.g. by the DataFileWatcher), so it is guarded by a lock.
+class FileHandlePool:
+    def __init__(self, max_open_files=None):
+        self.max_open_files = max_open_files
+        self._handles = collections.OrderedDict()
+        self._pin_counts = {}
+        self._lock = threading.RLock()
+
+    def get(self, key, open_function, pin=False):
+        "Returns the handle for key, opening it if needed, and pins it (until release(key)) if pin is True"
+        with self._lock:
+            if key in self._handles:
+                self._handles.move_to_end(key)
+                handle = self._handles[key]
+            else:
+                handle = open_function()
+                self._handles[key] = handle
+            if pin:
+                self._pin_counts[key] = self._pin_counts.get(key, 0) + 1
+            self._evict()
+            return handle
+
+    def release(self, key, close=False):
+        "Unpins the handle for key, and closes it if close is True and it is no longer pinned"
+        with self._lock:
+            pin_count = self._pin_counts.get(key, 0) - 1
+            if pin_count > 0:
+                self._pin_counts[key] = pin_count
+                return
+            self._pin_counts.pop(key, None)
+            if close and key in self._handles:
+                _close_handle(self._handles.pop(key))
+            else:
+                self._evict()
+
+    @property
+    def size(self):
+        if self.max_open_files is not None:
+            return self.max_open_files
+        return _pytest_option("--max-open-data-files", 16)
+
+    def _evict(self):
+        excess = len(self._handles) - max(self.size, 2)
+        if excess <= 0:
+            return
+        unpinned_keys = [key for key in self._handles if key not in self._pin_counts]
+        for key in unpinned_keys[:excess]:
+            _close_handle(self._handles.pop(key))
+
+def _close_handle(handle):
+    # h5py.File has a close method.  HDF5RawDataFile does not, and it closes its file
+    # when it is destroyed, which happens when the pool drops it, since the pool holds
+    # the only lasting reference (DataFile gets the handle from the pool on each use)
+    close_function = getattr(handle, "close", None)
+    if close_function is not None:
+        close_function()
+
+def _release_handles(pinned_keys, close):
+    for key in list(pinned_keys):
+        file_handle_pool.release(key, close)
+    pinned_keys.clear()
+
+file_handle_pool = FileHandlePool()
+
+# 18-Oct-2026: DataFile now also keeps an index of the information that the
+# fragment checks need (record IDs, the TC type of each record, the SourceIDs of each
+# fragment type, and fragment sizes).  The index is filled in lazily, the first time
+# that each piece of information is requested, and it is shared by all of the checks
+# that are run on the same DataFile, so that the file only needs to be opened with
+# HDF5RawDataFile, and each record only needs to be inspected, once.
+#
+# 18-Oct-2026: the file is only opened when it is first needed, and the open handles
+# are taken from file_handle_pool.  DataFile can be used as a context manager, which
+# closes the handles for the file when the block is left, e.g.
+#   with data_file_checks.DataFile(run_nanorc.data_files[0]) as data_file:
+#       assert data_file_checks.sanity_check(data_file)
 class DataFile:
     def __init__(self, filename):
-        self.h5file=h5py.File(filename, 'r')
-        self.events=self.h5file.keys()
         self.name=str(filename)
+        self._events=None
+        self._record_ids=None
+        self._tc_types={}
+        self._source_ids={}
+        self._fragment_sizes={}
+        self._ordinal_tables={}
+        self._record_summary=None
+        self._pinned_keys=set()
+        # unpin the handles if the DataFile is never closed
+        self._finalizer=weakref.finalize(self, _release_handles, self._pinned_keys, False)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        "Unpins the handles for the file, and closes them unless another DataFile is using them"
+        _release_handles(self._pinned_keys, True)
+
+    def _get_handle(self, key, open_function):
+        pin=key not in self._pinned_keys
+        handle=file_handle_pool.get(key, open_function, pin=pin)
+        if pin:
+            self._pinned_keys.add(key)
+        return handle
+
+    @property
+    def h5file(self):
+        return self._get_handle(("h5py", self.name), lambda: h5py.File(self.name, 'r'))
+
+    @property
+    def raw_data_file(self):
+        return self._get_handle(("hdf5libs", self.name), lambda: HDF5RawDataFile(self.name))
+
+    @property
+    def events(self):
+        if self._events is None:
+            self._events=list(self.h5file.keys())
+        return self._events
+
+    @property
+    def record_ids(self):
+        if self._record_ids is None:
+            self._record_ids=self.raw_data_file.get_all_record_ids()
+        return self._record_ids
+
+    @property
+    def record_summary(self):
+        """A dictionary, keyed by record (the top-level group names in the file), of
+        RecordSummary tuples with the number of TriggerRecordHeader datasets and the
+        number of other datasets in the RawData group of each record.  It is built by
+        listing the names in the RawData group of each record, without opening any
+        datasets or looking any deeper into the file.  This is the same traversal as
+        before it was cached: a single visit of the file (H5Ovisit, or H5Lvisit on the
+        links) was measured to be slower, because of the Python callback per object."""
+        if self._record_summary is None:
+            h5file=self.h5file
+            counts={event: [0, 0] for event in self.events}
+            for (event, c) in counts.items():
+                record=h5file[event]
+                if not isinstance(record, h5py.Group) or "RawData" not in record:
+                    continue
+                for name in record["RawData"]:
+                    c[0 if "TriggerRecordHeader" in name else 1] += 1
+            self._record_summary={event: RecordSummary(*c) for (event, c) in counts.items()}
+        return self._record_summary
+
+    def get_record_ordinal_table(self, ordinal_keys=None):
+        "Returns a RecordOrdinalTable for the records in the file, for the given ordinal keys"
+        key=None if ordinal_keys is None else frozenset(ordinal_keys)
+        if key not in self._ordinal_tables:
+            self._ordinal_tables[key]=RecordOrdinalTable(self.record_ids, ordinal_keys)
+        return self._ordinal_tables[key]
+
+    def get_TC_type(self, record_id):
+        if record_id not in self._tc_types:
+            self._tc_types[record_id]=get_TC_type(self.raw_data_file, record_id)
+        return self._tc_types[record_id]
+
+    def get_source_ids(self, record_id, fragment_type, subdetector=""):
+        "Returns the SourceIDs of the fragments of the given type (and, optionally, subdetector) in a record"
+        key=(record_id, fragment_type, subdetector)
+        if key not in self._source_ids:
+            if subdetector == "":
+                self._source_ids[key]=self.raw_data_file.get_source_ids_for_fragment_type(record_id, fragment_type)
+            else:
+                self._source_ids[key]=self.raw_data_file.get_source_ids_for_fragtype_and_subdetector(record_id, fragment_type, subdetector)
+        return self._source_ids[key]
+
+    def get_fragment_sizes(self, fragment_type, subdetector=""):
+        """Returns the sizes of all of the fragments of the given type (and, optionally,
+        subdetector) in the file, as a tuple of three parallel sequences: a NumPy array
+        with the index of the record of each fragment (within record_ids), a list of
+        the SourceIDs of the fragments, and a NumPy array of the fragment sizes.
+
+        The sizes are taken from the shapes of the HDF5 datasets that hold the
+        fragments, so no fragment data is read."""
+        key=(fragment_type, subdetector)
+        if key not in self._fragment_sizes:
+            record_indices=[]
+            src_id_list=[]
+            sizes=[]
+            h5file=self.h5file
+            raw_data_file=self.raw_data_file
+            for (record_index, rec) in enumerate(self.record_ids):
+                for src_id in self.get_source_ids(rec, fragment_type, subdetector):
+                    record_indices.append(record_index)
+                    src_id_list.append(src_id)
+                    sizes.append(h5file[raw_data_file.get_fragment_dataset_path(rec, src_id)].shape[0])
+            self._fragment_sizes[key]=(numpy.array(record_indices, dtype=numpy.int64), src_id_list, numpy.array(sizes, dtype=numpy.int64))
+        return self._fragment_sizes[key]
 
 def sanity_check(datafile):
     "Very basic sanity checks on file"
+    global _ordinal_self_tests_done
     passed=True
     print("") # Clear potential dot from pytest
 
-    # execute unit tests for local function(s)
+    # execute unit tests for local function(s), once per session
     # (this is probably not the best place for these...)
-    record_ordinal_string_all_tests()
+    if not _ordinal_self_tests_done:
+        record_ordinal_string_all_tests()
+        _ordinal_self_tests_done = True
 
     # Check that every event has a TriggerRecordHeader
+    record_summary = datafile.record_summary
     for event in datafile.events:
-        triggerrecordheader_count = 0
-        for key in datafile.h5file[event]["RawData"].keys():
-            if "TriggerRecordHeader" in key:
-                triggerrecordheader_count += 1
+        triggerrecordheader_count = record_summary[event].header_count
         if triggerrecordheader_count == 0:
             print(f"\N{POLICE CARS REVOLVING LIGHT} No TriggerRecordHeader in record {event} \N{POLICE CARS REVOLVING LIGHT}")
             passed=False
@@ -42,58 +271,100 @@ def sanity_check(datafile):
         print("\N{WHITE HEAVY CHECK MARK} Sanity-check passed")
     return passed
 
-def check_file_attributes(datafile):
-    "Checking that the expected Attributes exist within the data file"
+DataFileName = collections.namedtuple("DataFileName", ["op_env", "record_type", "run_number", "file_index", "timestamps"])
+
+_expected_attribute_names = ["application_name", "closing_timestamp", "creation_timestamp", "file_index", "filelayout_params", "filelayout_version", "offline_data_stream", "operational_environment", "record_type", "recorded_size", "run_number", "run_was_for_test_purposes", "source_id_geo_id_map"]
+_filename_prefix_re = re.compile(r"(.*?)_(raw|tp)_")
+_filename_run_number_re = re.compile(r"_run(\d+)_")
+_filename_file_index_re = re.compile(r"_(\d+)_")
+# (zero-width, so that overlapping candidates are all found)
+_filename_timestamp_re = re.compile(r"(?=(\d{8}T\d{6}))")
+
+# 18-Oct-2026: the information that is encoded in the name of a data file (e.g.
+# integtest_raw_run001234_0000_dataflow0_datawriter_0_20241030T123456.hdf5) is extracted
+# with compiled expressions, once per file.  The run number and file index are the
+# first "_run<N>_" and "_<N>_" in the name, and timestamps holds every date-time that
+# appears in the name, as seconds since the epoch (UTC).  Fields that can't be found
+# are None (an empty list for timestamps).
+def parse_data_file_name(base_filename):
+    prefix_match = _filename_prefix_re.match(base_filename)
+    run_match = _filename_run_number_re.search(base_filename)
+    index_match = _filename_file_index_re.search(base_filename)
+    timestamps = []
+    for match_obj in _filename_timestamp_re.finditer(base_filename):
+        try:
+            date_obj = datetime.datetime.strptime(match_obj.group(1), "%Y%m%dT%H%M%S").replace(tzinfo=datetime.timezone.utc)
+        except ValueError:
+            continue
+        timestamps.append(int(date_obj.timestamp()))
+    return DataFileName(
+        op_env=prefix_match.group(1) if prefix_match else None,
+        record_type=prefix_match.group(2) if prefix_match else None,
+        run_number=int(run_match.group(1)) if run_match else None,
+        file_index=int(index_match.group(1)) if index_match else None,
+        timestamps=timestamps,
+    )
+
+# 18-Oct-2026: the attributes are all read at once, and compared with the values from
+# the parsed filename.  The creation_timestamp check accepts a date-time in the filename
+# that is within one second of the attribute value (which is in milliseconds).
+def _check_attributes(base_filename, attrs):
     passed=True
-    base_filename = os.path.basename(datafile.h5file.filename)
-    if "tp" in base_filename:
-        print("") # Clear potential dot from pytest
-    expected_attribute_names = ["application_name", "closing_timestamp", "creation_timestamp", "file_index", "filelayout_params", "filelayout_version", "offline_data_stream", "operational_environment", "record_type", "recorded_size", "run_number", "run_was_for_test_purposes", "source_id_geo_id_map"]
-    for expected_attr_name in expected_attribute_names:
-        if expected_attr_name not in datafile.h5file.attrs.keys():
+    lines=[]
+    parsed_name = parse_data_file_name(base_filename)
+    for expected_attr_name in _expected_attribute_names:
+        if expected_attr_name not in attrs:
             passed=False
-            print(f"\N{POLICE CARS REVOLVING LIGHT} Attribute '{expected_attr_name}' not found in file {base_filename} \N{POLICE CARS REVOLVING LIGHT}")
-        elif expected_attr_name == "run_number":
-            # value from the Attribute
-            attr_value = datafile.h5file.attrs.get(expected_attr_name)
-            # value from the filename
-            pattern = r"_run\d+_"
-            match_obj = re.search(pattern, base_filename)
-            if match_obj:
-                filename_value = int(re.sub('run','',re.sub('_','',match_obj.group(0))))
-                if attr_value != filename_value:
-                    passed=False
-                    print(f"\N{POLICE CARS REVOLVING LIGHT} The value in Attribute '{expected_attr_name}' ({attr_value}) does not match the value in the filename ({base_filename}) \N{POLICE CARS REVOLVING LIGHT}")
-        elif expected_attr_name == "file_index":
+            lines.append(f"\N{POLICE CARS REVOLVING LIGHT} Attribute '{expected_attr_name}' not found in file {base_filename} \N{POLICE CARS REVOLVING LIGHT}")
+        elif expected_attr_name in ("run_number", "file_index"):
             # value from the Attribute
-            attr_value = datafile.h5file.attrs.get(expected_attr_name)
+            attr_value = attrs[expected_attr_name]
             # value from the filename
-            pattern = r"_\d+_"
-            match_obj = re.search(pattern, base_filename)
-            if match_obj:
-                filename_value = int(re.sub('_','',match_obj.group(0)))
-                if attr_value != filename_value:
-                    passed=False
-                    print(f"\N{POLICE CARS REVOLVING LIGHT} The value in Attribute '{expected_attr_name}' ({attr_value}) does not match the value in the filename ({base_filename}) \N{POLICE CARS REVOLVING LIGHT}")
+            filename_value = getattr(parsed_name, expected_attr_name)
+            if filename_value is not None and attr_value != filename_value:
+                passed=False
+                lines.append(f"\N{POLICE CARS REVOLVING LIGHT} The value in Attribute '{expected_attr_name}' ({attr_value}) does not match the value in the filename ({base_filename}) \N{POLICE CARS REVOLVING LIGHT}")
         elif expected_attr_name == "creation_timestamp":
-            attr_value = datafile.h5file.attrs.get(expected_attr_name)
-            date_obj = datetime.datetime.fromtimestamp((int(attr_value)/1000)-1, datetime.timezone.utc)
-            date_string = date_obj.strftime("%Y%m%dT%H%M%S")
-            pattern_low = f".*{date_string}.*"
-            date_obj = datetime.datetime.fromtimestamp((int(attr_value)/1000)+1, datetime.timezone.utc)
-            date_string = date_obj.strftime("%Y%m%dT%H%M%S")
-            pattern_high = f".*{date_string}.*"
-            date_obj = datetime.datetime.fromtimestamp((int(attr_value)/1000)+0, datetime.timezone.utc)
-            date_string = date_obj.strftime("%Y%m%dT%H%M%S")
-            pattern_exact = f".*{date_string}.*"
-            if not re.match(pattern_exact, base_filename) and not re.match(pattern_low, base_filename) and not re.match(pattern_high, base_filename):
+            attr_seconds = int(attrs[expected_attr_name]) // 1000
+            if not any(abs(timestamp - attr_seconds) <= 1 for timestamp in parsed_name.timestamps):
                 passed=False
-                print(f"\N{POLICE CARS REVOLVING LIGHT} The value in Attribute '{expected_attr_name}' ({date_string}) does not match the value in the filename ({base_filename}) \N{POLICE CARS REVOLVING LIGHT}")
-                print(f"\N{POLICE CARS REVOLVING LIGHT} Debug information: pattern_low={pattern_low} pattern_high={pattern_high} pattern_exact={pattern_exact} \N{POLICE CARS REVOLVING LIGHT}")
+                (pattern_low, pattern_high, pattern_exact) = [f".*{_format_filename_timestamp(attr_seconds + offset)}.*" for offset in (-1, 1, 0)]
+                lines.append(f"\N{POLICE CARS REVOLVING LIGHT} The value in Attribute '{expected_attr_name}' ({_format_filename_timestamp(attr_seconds)}) does not match the value in the filename ({base_filename}) \N{POLICE CARS REVOLVING LIGHT}")
+                lines.append(f"\N{POLICE CARS REVOLVING LIGHT} Debug information: pattern_low={pattern_low} pattern_high={pattern_high} pattern_exact={pattern_exact} \N{POLICE CARS REVOLVING LIGHT}")
     if passed:
-        print(f"\N{WHITE HEAVY CHECK MARK} All Attribute tests passed for file {base_filename}")
+        lines.append(f"\N{WHITE HEAVY CHECK MARK} All Attribute tests passed for file {base_filename}")
+    return (passed, lines)
+
+def _format_filename_timestamp(seconds):
+    return datetime.datetime.fromtimestamp(seconds, datetime.timezone.utc).strftime("%Y%m%dT%H%M%S")
+
+def check_file_attributes(datafile):
+    "Checking that the expected Attributes exist within the data file"
+    base_filename = os.path.basename(datafile.h5file.filename)
+    if "tp" in base_filename:
+        print("") # Clear potential dot from pytest
+    (passed, lines) = _check_attributes(base_filename, dict(datafile.h5file.attrs.items()))
+    for line in lines:
+        print(line)
     return passed
 
+# 18-Oct-2026: batch form of check_file_attributes, for checking the attributes of many
+# files.  Each file is opened with h5py just long enough to read its attributes (the
+# shared handle pool is not used, so that the handles of other files are not evicted).
+def check_all_file_attributes(file_names):
+    "Checking that the expected Attributes exist within each of the data files"
+    all_ok=True
+    print("") # Clear potential dot from pytest
+    for file_name in file_names:
+        with h5py.File(file_name, 'r') as h5file:
+            attrs = dict(h5file.attrs.items())
+        (passed, lines) = _check_attributes(os.path.basename(str(file_name)), attrs)
+        for line in lines:
+            print(line)
+        if not passed:
+            all_ok=False
+    return all_ok
+
 def check_event_count(datafile, expected_value, tolerance):
     "Checking that the number of records in the file is within tolerance of the expected_value"
     passed=True
@@ -107,6 +378,137 @@ def check_event_count(datafile, expected_value, tolerance):
         print(f"\N{WHITE HEAVY CHECK MARK} Record count {event_count} is within a tolerance of {tolerance} from an expected value of {expected_value}")
     return passed
 
+# 18-Oct-2026: the fragment count and size checks are implemented by the two classes
+# below, which look at one record at a time and collect their report lines, so that
+# several checks can share a single pass over the records in a file (see
+# check_fragments).  Each check reports its lines in the same order as it would if it
+# were run on its own.
+class _FragmentCheck:
+    limit_kind = None
+
+    def __init__(self, datafile, params):
+        self.datafile = datafile
+        self.params = params
+        self.debug_mask = params.get('debug_mask', 0)
+        self.subdet_string = params.get('subdetector', "")
+        self.lines = []
+        self.passed = True
+        self.min_list = []
+        self.max_list = []
+        self.limit_resolver = FragmentLimitResolver(params, self.limit_kind)
+        self.ready = self.report_parameter_problems()
+        self.passed = self.ready
+
+    def report_parameter_problems(self):
+        "Adds any new problems with the parameters to the report, and returns whether there were none"
+        resolver = self.limit_resolver
+        for problem in resolver.problems[resolver.reported_problem_count:]:
+            self.lines.append(f"\N{POLICE CARS REVOLVING LIGHT} Parameter problem: {problem} \N{POLICE CARS REVOLVING LIGHT}")
+        ok = resolver.reported_problem_count == len(resolver.problems)
+        resolver.reported_problem_count = len(resolver.problems)
+        return ok
+
+    def get_record_limits(self, rec, tc_type_string, ordinal_table, debug_bit):
+        rno_strings = ordinal_table.get_strings(rec)
+        limits = self.limit_resolver.get_limits(tc_type_string, rno_strings)
+        if (self.debug_mask & debug_bit) != 0:
+            self.lines.append(f'DataFileChecks Debug: the fragment {self.limit_kind} limits are {limits} for TC type {tc_type_string} and record ordinal strings {rno_strings}')
+        if limits[0] not in self.min_list:
+            self.min_list.append(limits[0])
+        if limits[1] not in self.max_list:
+            self.max_list.append(limits[1])
+        return limits
+
+    def print_report(self):
+        for line in self.lines:
+            print(line)
+        return self.passed
+
+class _FragmentCountCheck(_FragmentCheck):
+    limit_kind = "count"
+
+    def __init__(self, datafile, params):
+        super().__init__(datafile, params)
+        if not self.ready:
+            return
+        # the full ordinal words are only needed for the debug printout
+        self.ordinal_table = datafile.get_record_ordinal_table(None if (self.debug_mask & 0x1) != 0 else params.get('frag_counts_by_record_ordinal', {}).keys())
+
+    def check_record(self, record_index, rec, tc_type_string):
+        fragment_count_limits = self.get_record_limits(rec, tc_type_string, self.ordinal_table, 0x1)
+        src_ids = self.datafile.get_source_ids(rec, self.params['fragment_type'], self.subdet_string)
+        fragment_count=len(src_ids)
+        if (self.debug_mask & 0x2) != 0:
+            self.lines.append(f'  DataFileChecks Debug: fragment count is {fragment_count}')
+        if fragment_count<fragment_count_limits[0] or fragment_count>fragment_count_limits[1]:
+            self.passed=False
+            self.lines.append(f"\N{POLICE CARS REVOLVING LIGHT} Record {rec} has an unexpected number of {self.params['fragment_type_description']} fragments: {fragment_count} (outside range {fragment_count_limits}) \N{POLICE CARS REVOLVING LIGHT}")
+
+    def finish(self, record_count):
+        if not self.report_parameter_problems():
+            self.passed=False
+        if self.passed:
+            min_count_list = sorted(self.min_list)
+            max_count_list = sorted(self.max_list)
+            if len(min_count_list) > 1 or len(max_count_list) > 1 or min_count_list[0] != max_count_list[0]:
+                self.lines.append(f"\N{WHITE HEAVY CHECK MARK} {self.params['fragment_type_description']} fragment count in range {min_count_list} to {max_count_list} confirmed in all {record_count} records")
+            else:
+                self.lines.append(f"\N{WHITE HEAVY CHECK MARK} {self.params['fragment_type_description']} fragment count of {min_count_list[0]} confirmed in all {record_count} records")
+
+class _FragmentSizeCheck(_FragmentCheck):
+    limit_kind = "size"
+
+    def __init__(self, datafile, params):
+        super().__init__(datafile, params)
+        if not self.ready:
+            return
+        record_count = len(datafile.record_ids)
+        self.ordinal_table = datafile.get_record_ordinal_table(None if (self.debug_mask & 0x4) != 0 else params.get('frag_sizes_by_record_ordinal', {}).keys())
+        # float64, since the limits may be any non-negative number (including infinity)
+        self.record_min_sizes = numpy.empty(record_count, dtype=numpy.float64)
+        self.record_max_sizes = numpy.empty(record_count, dtype=numpy.float64)
+        self.record_size_limits = [None] * record_count
+
+    def check_record(self, record_index, rec, tc_type_string):
+        size_limits = self.get_record_limits(rec, tc_type_string, self.ordinal_table, 0x4)
+        self.record_min_sizes[record_index] = size_limits[0]
+        self.record_max_sizes[record_index] = size_limits[1]
+        self.record_size_limits[record_index] = size_limits
+
+    def finish(self, record_count):
+        # all of the fragment sizes are compared with the limits for their records in one
+        # vectorized operation, and only the failures are looked at individually
+        records = self.datafile.record_ids
+        (frag_record_indices, frag_src_ids, frag_sizes) = self.datafile.get_fragment_sizes(self.params['fragment_type'], self.subdet_string)
+        if (self.debug_mask & 0x8) != 0:
+            for (src_id, size) in zip(frag_src_ids, frag_sizes):
+                self.lines.append(f'  DataFileChecks Debug: fragment size for SourceID {src_id} is {size}')
+        bad_size_mask = (frag_sizes < self.record_min_sizes[frag_record_indices]) | (frag_sizes > self.record_max_sizes[frag_record_indices])
+        for frag_index in numpy.flatnonzero(bad_size_mask):
+            self.passed=False
+            record_index = frag_record_indices[frag_index]
+            size_limits = self.record_size_limits[record_index]
+            self.lines.append(f" \N{POLICE CARS REVOLVING LIGHT} {self.params['fragment_type_description']} fragment for SrcID {frag_src_ids[frag_index].to_string()} in record {records[record_index]} has size {frag_sizes[frag_index]} (outside range {size_limits}) \N{POLICE CARS REVOLVING LIGHT}")
+        if not self.report_parameter_problems():
+            self.passed=False
+        if self.passed:
+            min_size_list = sorted(self.min_list)
+            max_size_list = sorted(self.max_list)
+            self.lines.append(f"\N{WHITE HEAVY CHECK MARK} All {self.params['fragment_type_description']} fragments in {record_count} records have sizes between {min_size_list[0] if len(min_size_list) == 1 else min_size_list} and {max_size_list[0] if len(max_size_list) == 1 else max_size_list}")
+
+def _run_fragment_checks(datafile, checks):
+    "Runs a set of fragment checks in a single pass over the records in the file"
+    active_checks = [check for check in checks if check.ready]
+    if len(active_checks) == 0:
+        return
+    records = datafile.record_ids
+    for (record_index, rec) in enumerate(records):
+        tc_type_string = datafile.get_TC_type(rec)
+        for check in active_checks:
+            check.check_record(record_index, rec, tc_type_string)
+    for check in active_checks:
+        check.finish(len(records))
+
 # 18-Aug-2021, KAB: General-purposed test for fragment count.  The idea behind this test
 # is that each type of fragment can be tested individually, by calling this routine for
 # each type.  The test is driven by a set of parameters that describe both the fragments
@@ -118,47 +520,10 @@ def check_event_count(datafile, expected_value, tolerance):
 # * fragment_type - Type of the Fragment, e.g. "ProtoWIB" or "Trigger_Primitive"
 # * expected_fragment_count - the expected number of fragments of this type
 def check_fragment_count(datafile, params):
-    debug_mask = 0
-    if 'debug_mask' in params:
-        debug_mask = params['debug_mask']
-    min_count_list = []
-    max_count_list = []
-    subdet_string = ""
-    if 'subdetector' in params:
-        subdet_string = params['subdetector']
-
     "Checking that there are {params['expected_fragment_count']} {params['fragment_type_description']} fragments in each record in the file"
-    passed=True
-    h5_file = HDF5RawDataFile(datafile.name)
-    records = h5_file.get_all_record_ids()
-    for rec in records:
-        tc_type_string = get_TC_type(h5_file, rec)
-        rno_strings = get_record_ordinal_strings(rec, records)
-        fragment_count_limits = get_fragment_count_limits(params, tc_type_string, rno_strings)
-        if (debug_mask & 0x1) != 0:
-            print(f'DataFileChecks Debug: the fragment count limits are {fragment_count_limits} for TC type {tc_type_string} and record ordinal strings {rno_strings}')
-        if fragment_count_limits[0] not in min_count_list:
-            min_count_list.append(fragment_count_limits[0])
-        if fragment_count_limits[1] not in max_count_list:
-            max_count_list.append(fragment_count_limits[1])
-        if subdet_string == "":
-            src_ids = h5_file.get_source_ids_for_fragment_type(rec, params['fragment_type'])
-        else:
-            src_ids = h5_file.get_source_ids_for_fragtype_and_subdetector(rec, params['fragment_type'], subdet_string)
-        fragment_count=len(src_ids)
-        if (debug_mask & 0x2) != 0:
-            print(f'  DataFileChecks Debug: fragment count is {fragment_count}')
-        if fragment_count<fragment_count_limits[0] or fragment_count>fragment_count_limits[1]:
-            passed=False
-            print(f"\N{POLICE CARS REVOLVING LIGHT} Record {rec} has an unexpected number of {params['fragment_type_description']} fragments: {fragment_count} (outside range {fragment_count_limits}) \N{POLICE CARS REVOLVING LIGHT}")
-    if passed:
-        min_count_list.sort()
-        max_count_list.sort()
-        if len(min_count_list) > 1 or len(max_count_list) > 1 or min_count_list[0] != max_count_list[0]:
-            print(f"\N{WHITE HEAVY CHECK MARK} {params['fragment_type_description']} fragment count in range {min_count_list} to {max_count_list} confirmed in all {len(records)} records")
-        else:
-            print(f"\N{WHITE HEAVY CHECK MARK} {params['fragment_type_description']} fragment count of {min_count_list[0]} confirmed in all {len(records)} records")
-    return passed
+    check = _FragmentCountCheck(datafile, params)
+    _run_fragment_checks(datafile, [check])
+    return check.print_report()
 
 # 18-Aug-2021, KAB: general-purposed test for fragment sizes.  The idea behind this test
 # is that each type of fragment can be tested individually, by calling this routine for
@@ -172,45 +537,181 @@ def check_fragment_count(datafile, params):
 # * min_size_bytes - the minimum size of fragments of this type
 # * max_size_bytes - the maximum size of fragments of this type
 def check_fragment_sizes(datafile, params):
+    "Checking that every {params['fragment_type_description']} fragment size is within its allowed range"
     if params['expected_fragment_count'] == 0:
         return True
-    debug_mask = 0
-    if 'debug_mask' in params:
-        debug_mask = params['debug_mask']
-    min_size_list = []
-    max_size_list = []
-    subdet_string = ""
-    if 'subdetector' in params:
-        subdet_string = params['subdetector']
+    check = _FragmentSizeCheck(datafile, params)
+    _run_fragment_checks(datafile, [check])
+    return check.print_report()
 
-    "Checking that every {params['fragment_type_description']} fragment size is within its allowed range"
-    passed=True
-    h5_file = HDF5RawDataFile(datafile.name)
-    records = h5_file.get_all_record_ids()
-    for rec in records:
-        tc_type_string = get_TC_type(h5_file, rec)
-        rno_strings = get_record_ordinal_strings(rec, records)
-        size_limits = get_fragment_size_limits(params, tc_type_string, rno_strings)
-        if (debug_mask & 0x4) != 0:
-            print(f'DataFileChecks Debug: the fragment size limits are {size_limits} for TC type {tc_type_string} and record ordinal strings {rno_strings}')
-        if size_limits[0] not in min_size_list:
-            min_size_list.append(size_limits[0])
-        if size_limits[1] not in max_size_list:
-            max_size_list.append(size_limits[1])
-        if subdet_string == "":
-            src_ids = h5_file.get_source_ids_for_fragment_type(rec, params['fragment_type'])
-        else:
-            src_ids = h5_file.get_source_ids_for_fragtype_and_subdetector(rec, params['fragment_type'], subdet_string)
-        for src_id in src_ids:
-            frag=h5_file.get_frag(rec,src_id);
-            size=frag.get_size()
-            if (debug_mask & 0x8) != 0:
-                print(f'  DataFileChecks Debug: fragment size for SourceID {src_id} is {size}')
-            if size<size_limits[0] or size>size_limits[1]:
-                passed=False
-                print(f" \N{POLICE CARS REVOLVING LIGHT} {params['fragment_type_description']} fragment for SrcID {src_id.to_string()} in record {rec} has size {size} (outside range {size_limits}) \N{POLICE CARS REVOLVING LIGHT}")
-    if passed:
-        min_size_list.sort()
-        max_size_list.sort()
-        print(f"\N{WHITE HEAVY CHECK MARK} All {params['fragment_type_description']} fragments in {len(records)} records have sizes between {min_size_list[0] if len(min_size_list) == 1 else min_size_list} and {max_size_list[0] if len(max_size_list) == 1 else max_size_list}")
-    return passed
+# 18-Oct-2026: check_fragments runs the record-count check (if an expected record count
+# is given) and the fragment count and size checks for every set of parameters in
+# params_list, in a single pass over the records in the file.  The report lines are the
+# same as those from check_event_count, check_fragment_count and check_fragment_sizes,
+# and they are printed in the same order as if those functions had been called for each
+# set of parameters in turn.  The return value is a dictionary with the result of each
+# check, keyed by the fragment_type_description of each set of parameters (each result
+# combines the count and size checks for that fragment type), plus a "record_count" entry
+# when the record count was checked.  For example:
+#   results = check_fragments(data_file, [wib_frag_params, triggercandidate_frag_params], expected_record_count, 1)
+#   assert all(results.values())
+def check_fragments(datafile, params_list, expected_record_count=None, record_count_tolerance=0):
+    results = {}
+    if expected_record_count is not None:
+        results["record_count"] = check_event_count(datafile, expected_record_count, record_count_tolerance)
+    check_pairs = []
+    for params in params_list:
+        count_check = _FragmentCountCheck(datafile, params)
+        size_check = None
+        if params.get('expected_fragment_count') != 0:
+            size_check = _FragmentSizeCheck(datafile, params)
+        check_pairs.append((params, count_check, size_check))
+    _run_fragment_checks(datafile, [check for (params, count_check, size_check) in check_pairs
+                                    for check in (count_check, size_check) if check is not None])
+    for (params, count_check, size_check) in check_pairs:
+        passed = count_check.print_report()
+        if size_check is not None:
+            passed = size_check.print_report() and passed
+        description = params.get('fragment_type_description', params.get('fragment_type'))
+        results[description] = results.get(description, True) and passed
+    return results
+
+# 18-Oct-2026: check_data_files runs a list of checks on each of a list of data files,
+# optionally in a pool of worker processes (one file per task).  Each entry in checks is
+# a tuple of a check function from this module (or any other picklable function that
+# takes a DataFile as its first argument) and its remaining arguments, for example:
+#   checks = [(data_file_checks.sanity_check,),
+#             (data_file_checks.check_file_attributes,),
+#             (data_file_checks.check_fragments, [wib_frag_params, hsi_frag_params], expected_event_count, 1)]
+#   assert data_file_checks.check_data_files(run_nanorc.data_files, checks)
+# The report from each file is printed as a block, in the order of file_names,
+# regardless of the order in which the workers finish.  The number of workers is taken
+# from the n_workers argument or, if that is not specified, from the
+# --data-file-check-workers pytest option (default 1, i.e. serial checking in this
+# process; 0 means one worker per CPU).  The return value is True if every check passed
+# for every file (a check that returns a dictionary of results, like check_fragments,
+# passes if all of its results are True).
+def check_data_files(file_names, checks, n_workers=None):
+    all_ok=True
+    if n_workers is None:
+        n_workers = _default_worker_count()
+    if n_workers == 0:
+        n_workers = os.cpu_count()
+    n_workers = min(n_workers, len(file_names))
+
+    if n_workers <= 1:
+        for file_name in file_names:
+            print(f"---------- Checking data file {os.path.basename(str(file_name))} ----------")
+            if not all(_run_data_file_checks(file_name, checks)):
+                all_ok=False
+        return all_ok
+
+    with _data_file_check_pool(n_workers) as executor:
+        futures = [executor.submit(_run_data_file_checks_captured, file_name, checks) for file_name in file_names]
+        for (file_name, future) in zip(file_names, futures):
+            (results, output) = future.result()
+            print(f"---------- Checking data file {os.path.basename(str(file_name))} ----------")
+            print(output, end="")
+            if not all(results):
+                all_ok=False
+    return all_ok
+
+def _data_file_check_pool(n_workers):
+    """A pool of worker processes for the data-file checks.  The workers are started with
+    spawn rather than fork, since the pytest process has other threads (e.g. the data
+    directory janitor and the log watcher) that could hold locks when it forks"""
+    return concurrent.futures.ProcessPoolExecutor(
+        max_workers=n_workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_data_file_check_worker,
+        initargs=(file_handle_pool.size,),
+    )
+
+def _init_data_file_check_worker(max_open_files):
+    # spawned workers do not inherit the settings from the pytest options
+    file_handle_pool.max_open_files = max_open_files
+
+def _run_data_file_checks(file_name, checks):
+    results = []
+    with DataFile(file_name) as datafile:
+        for (check_function, *args) in checks:
+            result = check_function(datafile, *args)
+            if isinstance(result, dict):
+                result = all(result.values())
+            results.append(bool(result))
+    return results
+
+def _run_data_file_checks_captured(file_name, checks):
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        results = _run_data_file_checks(file_name, checks)
+    return (results, output.getvalue())
+
+# 18-Oct-2026: DataFileWatcher checks data files while the DAQ session is still running.
+# It polls the data directories for files that match the given pattern, and a file is
+# considered complete once it no longer has the ".writing" suffix that is used while it
+# is being written (the pattern doesn't match those names) and its closing_timestamp
+# Attribute is present.  Each completed file is handed to a background worker process,
+# which runs the checks (a list of (check_function, *args) tuples, as for
+# check_data_files) on it.  When the watcher is stopped, any remaining files are checked
+# whether or not they look complete, and report() prints the results in file order.
+class DataFileWatcher(threading.Thread):
+    def __init__(self, data_dirs, file_pattern, checks, n_workers=None, poll_interval=1.0):
+        super().__init__(name="DataFileWatcher", daemon=True)
+        self.data_dirs = [pathlib.Path(data_dir) for data_dir in data_dirs]
+        self.file_pattern = file_pattern
+        self.checks = checks
+        self.poll_interval = poll_interval
+        if n_workers is None:
+            n_workers = _default_worker_count()
+        if n_workers == 0:
+            n_workers = os.cpu_count()
+        # (started with spawn, since checks are submitted from this thread while others run)
+        self._executor = _data_file_check_pool(max(n_workers, 1))
+        self._futures = {}
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.poll_interval):
+            self.poll()
+
+    def stop(self):
+        "Stops watching, checks any files that have not been checked yet, and waits for all of the checks to finish"
+        self._stop_event.set()
+        if self.is_alive():
+            self.join()
+        self.poll(only_closed_files=False)
+        concurrent.futures.wait(list(self._futures.values()))
+        self._executor.shutdown()
+
+    def poll(self, only_closed_files=True):
+        for data_dir in self.data_dirs:
+            for file_obj in data_dir.glob(self.file_pattern):
+                file_name = str(file_obj)
+                if file_name in self._futures:
+                    continue
+                if only_closed_files and not _data_file_is_closed(file_name):
+                    continue
+                self._futures[file_name] = self._executor.submit(_run_data_file_checks_captured, file_name, self.checks)
+
+    @property
+    def checked_files(self):
+        return sorted(self._futures)
+
+    def report(self):
+        all_ok=True
+        for file_name in self.checked_files:
+            (results, output) = self._futures[file_name].result()
+            print(f"---------- Checking data file {os.path.basename(file_name)} ----------")
+            print(output, end="")
+            if not all(results):
+                all_ok=False
+        return all_ok
+
+def _data_file_is_closed(file_name):
+    try:
+        with h5py.File(file_name, 'r') as h5file:
+            return "closing_timestamp" in h5file.attrs
+    except OSError:
+        # the file is still locked, or not yet readable, by the data writer
+        return False
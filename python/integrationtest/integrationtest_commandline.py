@@ -1,5 +1,7 @@
 import pytest
 import pathlib
+import integrationtest.log_file_checks as log_file_checks
+import integrationtest.timeline as timeline
 
 def file_exists(s):
     p=pathlib.Path(s)
@@ -28,9 +30,137 @@ def pytest_addoption(parser):
         help="Whether to disable the Connectivity Service for this test",
         required=False
     )
+    parser.addoption(
+        "--connsvc-startup-timeout",
+        action="store",
+        type=float,
+        default=60.0,
+        help="Maximum time, in seconds, to wait for a newly-started Connectivity Service to accept connections. Default is 60",
+        required=False
+    )
+    parser.addoption(
+        "--config-cache-dir",
+        action="store",
+        type=pathlib.Path,
+        default=None,
+        help="Directory in which generated configurations are cached, so that identical configurations are not generated again. Default is no caching",
+        required=False
+    )
+    parser.addoption(
+        "--serial-config-generation",
+        action="store_true",
+        default=False,
+        help="Whether to generate the configuration segments one after the other, instead of in parallel processes (useful for debugging)",
+        required=False
+    )
+    parser.addoption(
+        "--max-concurrent-sessions",
+        action="store",
+        type=int,
+        default=1,
+        help="Maximum number of drunc sessions to run at the same time when a test module has several nanorc_command_list entries. Default is 1, i.e. one session after the other",
+        required=False
+    )
+    parser.addoption(
+        "--phase-summary",
+        action="store",
+        type=int,
+        default=10,
+        help="Number of the slowest configuration, run and check phases to list at the end of the session (0 for none). Default is 10",
+        required=False
+    )
+    parser.addoption(
+        "--log-check-workers",
+        action="store",
+        type=int,
+        default=1,
+        help="Number of worker processes used to check log files in parallel (0 means one per CPU). Default is 1, i.e. serial checking",
+        required=False
+    )
+    parser.addoption(
+        "--data-file-check-workers",
+        action="store",
+        type=int,
+        default=1,
+        help="Number of worker processes used by data_file_checks.check_data_files to check data files in parallel (0 means one per CPU). Default is 1, i.e. serial checking",
+        required=False
+    )
+    parser.addoption(
+        "--max-open-data-files",
+        action="store",
+        type=int,
+        default=16,
+        help="Maximum number of HDF5 file handles that data_file_checks keeps open at the same time. Default is 16",
+        required=False
+    )
+    parser.addoption(
+        "--log-check-mmap",
+        action="store_true",
+        default=False,
+        help="Whether to check log files with memory-mapped, bytes-level searches (recommended for very large logs)",
+        required=False
+    )
+    parser.addoption(
+        "--log-watcher",
+        action="store_true",
+        default=False,
+        help="Whether to check the log files while the DAQ session is running, so that only the remainder needs to be checked afterwards",
+        required=False
+    )
+    parser.addoption(
+        "--log-watcher-abort",
+        action="store_true",
+        default=False,
+        help="Whether to terminate the DAQ session as soon as a log file shows an error that is not excluded (implies --log-watcher)",
+        required=False
+    )
+    parser.addoption(
+        "--data-file-watcher",
+        action="store_true",
+        default=False,
+        help="Whether to run the checks in the test module's streaming_data_file_checks on each raw data file as soon as it is closed, while the DAQ session is running",
+        required=False
+    )
+
+# The pytest configuration, for modules that read the options when they are first used
+# (e.g. data_file_checks, which is only imported when needed, since it brings in the HDF5
+# libraries)
+pytest_config = None
 
 def pytest_configure(config):
+    global pytest_config
+    pytest_config = config
     for opt in ("--nanorc-path",):
         p=config.getoption(opt)
         if p is not None and not file_exists(p):
-            pytest.exit(f"{opt} path {p} is not an existing file")
\ No newline at end of file
+            pytest.exit(f"{opt} path {p} is not an existing file")
+    if config.getoption("--max-concurrent-sessions") < 1:
+        pytest.exit("--max-concurrent-sessions must be at least 1")
+    if config.getoption("--log-check-workers") < 0:
+        pytest.exit("--log-check-workers must not be negative")
+    log_file_checks.log_check_workers = config.getoption("--log-check-workers")
+    log_file_checks.log_check_use_mmap = config.getoption("--log-check-mmap")
+    if config.getoption("--data-file-check-workers") < 0:
+        pytest.exit("--data-file-check-workers must not be negative")
+    if config.getoption("--max-open-data-files") < 2:
+        pytest.exit("--max-open-data-files must be at least 2")
+
+# 18-Oct-2026: the checks made by each test are added to the timeline of the run that
+# the test uses
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_call(item):
+    run_timeline = getattr(getattr(item, "funcargs", {}).get("run_nanorc"), "timeline", None)
+    if run_timeline is None:
+        yield
+        return
+    with run_timeline.phase(f"check {item.name}"):
+        yield
+    run_timeline.save()
+
+def pytest_terminal_summary(terminalreporter):
+    phases = timeline.slowest_phases(terminalreporter.config.getoption("--phase-summary"))
+    if len(phases) == 0:
+        return
+    terminalreporter.write_sep("=", f"slowest {len(phases)} integration test phases")
+    for (label, phase) in phases:
+        terminalreporter.write_line(f"{phase['wall_time']:9.2f}s wall {phase['child_cpu_time']:9.2f}s subprocess CPU  {label}: {phase['name']}")
@@ -3,10 +3,24 @@ import subprocess
 import pathlib
 import getpass
 import os
+import re
+import signal
+import fnmatch
+import concurrent.futures
+import multiprocessing
+import dataclasses
+import hashlib
+import json
+import shutil
 import pkg_resources
 import conffwk
 from integrationtest.integrationtest_commandline import file_exists
-from integrationtest.data_classes import CreateConfigResult
+from integrationtest.data_classes import CreateConfigResult, FileStat, RunResult
+from integrationtest.log_file_checks import LogWatcher
+from integrationtest.connectivity_service import ConnectivityServicePool
+from integrationtest.session_scheduler import ScheduledSession, run_sessions
+from integrationtest.data_directories import DataDirectoryJanitor, make_isolated_data_dir
+from integrationtest.timeline import PhaseTimeline
 from daqconf.generate_hwmap import generate_hwmap
 from daqconf.generate import (
     generate_readout,
@@ -25,6 +39,11 @@ import time
 import random
 
 
+# The application classes that are indexed by create_config_files to find the data
+# writers, and whose members are listed in CreateConfigResult.apps_by_class
+data_writer_app_classes = ("DFApplication", "TPStreamWriterApplication")
+
+
 def parametrize_fixture_with_items(metafunc, fixture, itemsname):
     """Parametrize a fixture using the contents of variable `listname`
     from module scope. We want to distinguish between the cases where
@@ -39,11 +58,19 @@ def parametrize_fixture_with_items(metafunc, fixture, itemsname):
             fixture, the_items.values(), ids=the_items.keys(), indirect=True
         )
     elif isinstance(the_items, list) or isinstance(the_items, tuple):
-        if type(the_items[0]) == str:
-            params = [the_items]
-        else:
-            params = the_items
-        metafunc.parametrize(fixture, params, indirect=True)
+        metafunc.parametrize(fixture, items_as_params(the_items), indirect=True)
+
+
+def items_as_params(the_items):
+    """Return the list of parameters that parametrize_fixture_with_items
+    makes from `the_items`, in the same order
+
+    """
+    if isinstance(the_items, dict):
+        return list(the_items.values())
+    if type(the_items[0]) == str:
+        return [the_items]
+    return list(the_items)
 
 
 def pytest_generate_tests(metafunc):
@@ -61,8 +88,198 @@ def pytest_generate_tests(metafunc):
     parametrize_fixture_with_items(metafunc, "run_nanorc", "nanorc_command_list")
 
 
+def config_cache_key(drunc_config, object_databases, disable_connectivity_service):
+    """Return a hash of the inputs that determine the configuration generated by
+    create_config_files: the drunc_config (including its config_substitutions, but
+    not the connectivity service port, which is assigned separately), the contents of
+    the object databases and of any preconfigured config_db, and the daqconf version
+
+    """
+    config_fields = dataclasses.asdict(drunc_config)
+    del config_fields["connsvc_port"]
+    try:
+        daqconf_version = pkg_resources.get_distribution("daqconf").version
+    except pkg_resources.DistributionNotFound:
+        daqconf_version = "unknown"
+
+    key_hash = hashlib.sha256()
+    key_hash.update(
+        json.dumps(
+            [config_fields, disable_connectivity_service, daqconf_version],
+            sort_keys=True,
+            default=str,
+        ).encode()
+    )
+    for db_file in list(object_databases) + [drunc_config.config_db]:
+        if file_exists(db_file):
+            key_hash.update(pathlib.Path(db_file).name.encode())
+            key_hash.update(pathlib.Path(db_file).read_bytes())
+    return key_hash.hexdigest()
+
+
+def store_cached_config(config_db, cached_config_db):
+    """Copy config_db into the configuration cache. The copy is made under a
+    temporary name and then renamed, so that concurrent test sessions sharing the
+    cache never see a partially-written file
+
+    """
+    cached_config_db.parent.mkdir(parents=True, exist_ok=True)
+    temp_file = cached_config_db.with_name(f"{cached_config_db.name}.{os.getpid()}.tmp")
+    shutil.copyfile(config_db, temp_file)
+    os.replace(temp_file, cached_config_db)
+
+
+def generate_readout_segment(drunc_config, dro_map_file, readout_db, include):
+    """Generate the readout segment file, along with the readout map that it needs
+    (or the fake-data segment, when drunc_config.use_fakedataprod is set)
+
+    """
+    if not drunc_config.use_fakedataprod:
+        if not file_exists(dro_map_file):
+            dro_map_config = drunc_config.dro_map_config
+            if dro_map_config != None:
+                generate_hwmap(
+                    dro_map_file,
+                    dro_map_config.n_streams,
+                    dro_map_config.n_apps,
+                    dro_map_config.det_id,
+                    dro_map_config.app_host,
+                    dro_map_config.eth_protocol,
+                    dro_map_config.flx_mode,
+                )
+
+        if not file_exists(readout_db):
+            generate_readout(
+                readoutmap=dro_map_file,
+                oksfile=readout_db,
+                include=include,
+                generate_segment=True,
+                emulated_file_name=drunc_config.frame_file,
+                tpg_enabled=drunc_config.tpg_enabled,
+            )
+    elif not file_exists(readout_db):
+        generate_fakedata(
+            oksfile=readout_db,
+            include=include,
+            generate_segment=True,
+            n_streams=drunc_config.dro_map_config.n_streams,
+            n_apps=drunc_config.dro_map_config.n_apps,
+            det_id=drunc_config.dro_map_config.det_id,
+        )
+
+
+def timed_call(function, kwargs):
+    """Call function(**kwargs), and return its start time, wall time and CPU time"""
+    start_time = time.time()
+    start_counter = time.perf_counter()
+    start_times = os.times()
+    function(**kwargs)
+    end_times = os.times()
+    return (
+        start_time,
+        time.perf_counter() - start_counter,
+        (end_times.user - start_times.user) + (end_times.system - start_times.system),
+    )
+
+
+def run_segment_generators(segment_generators, parallel=True, timeline=None):
+    """Run each (function, keyword_arguments) pair in segment_generators, in a pool
+    of processes when parallel is True, or one after the other otherwise. An
+    exception raised by any of the generators is re-raised here, once all of the
+    generators have finished. The time taken by each generator is added to the
+    timeline, if one is given
+
+    """
+    if not parallel or len(segment_generators) < 2:
+        for function, kwargs in segment_generators:
+            (start_time, wall_time, cpu_time) = timed_call(function, kwargs)
+            if timeline is not None:
+                timeline.add(function.__name__, start_time, wall_time, cpu_time=cpu_time)
+        return
+
+    # the workers are started with spawn rather than fork, since the pytest process has
+    # other threads (e.g. the data directory janitor) that could hold locks when it forks
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=len(segment_generators),
+        mp_context=multiprocessing.get_context("spawn"),
+    ) as executor:
+        futures = [
+            executor.submit(timed_call, function, kwargs)
+            for function, kwargs in segment_generators
+        ]
+        concurrent.futures.wait(futures)
+    for (function, kwargs), future in zip(segment_generators, futures):
+        (start_time, wall_time, cpu_time) = future.result()
+        if timeline is not None:
+            timeline.add(
+                function.__name__, start_time, wall_time, child_cpu_time=cpu_time
+            )
+
+
+def apply_config_substitutions(db, substitutions):
+    """Apply the config_substitutions to the objects in db (without committing).
+
+    The substitutions are applied in their order, so later values win.  The objects of
+    each class are looked up only once, and each DAL is kept (keyed by class and ID)
+    and only passed to update_dal once, at the end.  An object is only ever held as one
+    DAL at a time: before it is fetched as another class, its DAL is written to db (if
+    it has been changed) and dropped, so that the new DAL sees the earlier changes
+
+    """
+    start_time = time.perf_counter()
+    dals = {}
+    classes_by_uid = {}
+    uids_by_class = {}
+    changed_dals = {}
+    updated_uids = set()
+
+    def write_and_drop_other_dals(obj_class, uid):
+        for other_class in classes_by_uid.get(uid, set()) - {obj_class}:
+            other_key = (other_class, uid)
+            if other_key in changed_dals:
+                db.update_dal(changed_dals.pop(other_key))
+            del dals[other_key]
+        classes_by_uid[uid] = {obj_class}
+
+    def get_obj(obj_class, uid):
+        key = (obj_class, uid)
+        if key not in dals:
+            write_and_drop_other_dals(obj_class, uid)
+            dals[key] = db.get_dal(class_name=obj_class, uid=uid)
+        return dals[key]
+
+    for substitution in substitutions:
+        obj_class = substitution.obj_class
+        if substitution.obj_id != "*":
+            objs = [get_obj(obj_class, substitution.obj_id)]
+        else:
+            if obj_class not in uids_by_class:
+                uids = []
+                for obj in db.get_dals(class_name=obj_class):
+                    if len(classes_by_uid.get(obj.id, set()) - {obj_class}) == 0:
+                        dals.setdefault((obj_class, obj.id), obj)
+                        classes_by_uid[obj.id] = {obj_class}
+                    uids.append(obj.id)
+                uids_by_class[obj_class] = uids
+            objs = [get_obj(obj_class, uid) for uid in uids_by_class[obj_class]]
+        for obj in objs:
+            for name, value in substitution.updates.items():
+                setattr(obj, name, value)
+            changed_dals[(obj_class, obj.id)] = obj
+            updated_uids.add(obj.id)
+
+    for obj in changed_dals.values():
+        db.update_dal(obj)
+
+    if len(substitutions) > 0:
+        print(
+            f"Applied {len(substitutions)} config substitutions to {len(updated_uids)} objects"
+            f" in {time.perf_counter() - start_time:.3f} s"
+        )
+
+
 @pytest.fixture(scope="module")
-def create_config_files(request, tmp_path_factory):
+def create_config_files(request, data_directory_janitor, tmp_path_factory):
     """Run the confgen to produce the configuration json files
 
     The name of the module to use is taken (indirectly) from the
@@ -94,107 +311,130 @@ def create_config_files(request, tmp_path_factory):
 
     integtest_conf = drunc_config.config_db
 
+    # 18-Oct-2026: the time taken by each phase of making the configuration is recorded
+    timeline = PhaseTimeline(f"{request.module.__name__} config{request.param_index}")
+
     object_databases = getattr(request.module, "object_databases", [])
-    local_object_databases = copy_configuration(config_dir, object_databases)
+    with timeline.phase("copy_configuration"):
+        local_object_databases = copy_configuration(config_dir, object_databases)
+
+    # 18-Oct-2026: when --config-cache-dir is given, the resolved configuration is
+    # stored there, under a hash of everything that goes into generating it, and a
+    # later create_config_files with the same inputs simply copies it
+    config_cache_dir = request.config.getoption("--config-cache-dir")
+    cached_config_db = None
+    if config_cache_dir is not None:
+        cache_key = config_cache_key(
+            drunc_config, local_object_databases, disable_connectivity_service
+        )
+        cached_config_db = pathlib.Path(config_cache_dir) / f"{cache_key}.data.xml"
 
     print()  # Blank line
-    if file_exists(integtest_conf):
+    config_is_cached = cached_config_db is not None and file_exists(cached_config_db)
+    if config_is_cached:
+        print(f"Using cached configuration {cached_config_db}")
+        shutil.copyfile(cached_config_db, config_db)
+    elif file_exists(integtest_conf):
         print(f"Integtest preconfigured config file: {integtest_conf}")
-        consolidate_files(str(temp_config_db), integtest_conf, *local_object_databases)
+        with timeline.phase("consolidate_files"):
+            consolidate_files(str(temp_config_db), integtest_conf, *local_object_databases)
     else:
-        if not drunc_config.use_fakedataprod:
-            if not file_exists(dro_map_file):
-                dro_map_config = drunc_config.dro_map_config
-                if dro_map_config != None:
-                    generate_hwmap(
-                        str(dro_map_file),
-                        dro_map_config.n_streams,
-                        dro_map_config.n_apps,
-                        dro_map_config.det_id,
-                        dro_map_config.app_host,
-                        dro_map_config.eth_protocol,
-                        dro_map_config.flx_mode,
-                    )
-
-            if not file_exists(readout_db):
-                generate_readout(
-                    readoutmap=str(dro_map_file),
-                    oksfile=str(readout_db),
+        # 18-Oct-2026: the segment files are independent of each other, so they are
+        # generated concurrently in separate processes (unless
+        # --serial-config-generation is given), and generate_session waits for all of them
+        segment_generators = [
+            (
+                generate_readout_segment,
+                dict(
+                    drunc_config=drunc_config,
+                    dro_map_file=str(dro_map_file),
+                    readout_db=str(readout_db),
+                    include=local_object_databases,
+                ),
+            ),
+            (
+                generate_trigger,
+                dict(
+                    oksfile=str(trigger_db),
                     include=local_object_databases,
                     generate_segment=True,
-                    emulated_file_name=drunc_config.frame_file,
                     tpg_enabled=drunc_config.tpg_enabled,
+                    hsi_enabled=drunc_config.fake_hsi_enabled,
+                ),
+            ),
+            (
+                generate_dataflow,
+                dict(
+                    oksfile=str(dataflow_db),
+                    include=local_object_databases,
+                    n_dfapps=drunc_config.n_df_apps,
+                    tpwriting_enabled=drunc_config.tpg_enabled,
+                    generate_segment=True,
+                    n_data_writers=drunc_config.n_data_writers,
+                ),
+            ),
+        ]
+        if drunc_config.fake_hsi_enabled:
+            segment_generators.append(
+                (
+                    generate_hsi,
+                    dict(
+                        oksfile=str(hsi_db),
+                        include=local_object_databases,
+                        generate_segment=True,
+                    ),
                 )
-        elif not file_exists(readout_db):
-            generate_fakedata(
-                oksfile=str(readout_db),
-                include=local_object_databases,
-                generate_segment=True,
-                n_streams=drunc_config.dro_map_config.n_streams,
-                n_apps=drunc_config.dro_map_config.n_apps,
-                det_id=drunc_config.dro_map_config.det_id,
+            )
+        with timeline.phase("generate_segments"):
+            run_segment_generators(
+                segment_generators,
+                parallel=not request.config.getoption("--serial-config-generation"),
+                timeline=timeline,
             )
 
-        generate_trigger(
-            oksfile=str(trigger_db),
-            include=local_object_databases,
-            generate_segment=True,
-            tpg_enabled=drunc_config.tpg_enabled,
-            hsi_enabled=drunc_config.fake_hsi_enabled,
-        )
-        if drunc_config.fake_hsi_enabled:
-            generate_hsi(
-                oksfile=str(hsi_db),
-                include=local_object_databases,
-                generate_segment=True,
+        with timeline.phase("generate_session"):
+            generate_session(
+                oksfile=str(temp_config_db),
+                include=local_object_databases
+                + [str(readout_db), str(trigger_db), str(dataflow_db)]
+                + ([str(hsi_db)] if drunc_config.fake_hsi_enabled else []),
+                session_name=drunc_config.session,
+                op_env=drunc_config.op_env,
+                connectivity_service_is_infrastructure_app=drunc_config.drunc_connsvc,
+                disable_connectivity_service=disable_connectivity_service,
             )
-        generate_dataflow(
-            oksfile=str(dataflow_db),
-            include=local_object_databases,
-            n_dfapps=drunc_config.n_df_apps,
-            tpwriting_enabled=drunc_config.tpg_enabled,
-            generate_segment=True,
-            n_data_writers=drunc_config.n_data_writers,
-        )
 
-        generate_session(
-            oksfile=str(temp_config_db),
-            include=local_object_databases
-            + [str(readout_db), str(trigger_db), str(dataflow_db)]
-            + ([str(hsi_db)] if drunc_config.fake_hsi_enabled else []),
+    if not config_is_cached:
+        with timeline.phase("consolidate_db"):
+            consolidate_db(str(temp_config_db), str(config_db))
+
+    with timeline.phase("set_connectivity_service_port"):
+        drunc_config.connsvc_port = set_connectivity_service_port(
+            oksfile=str(config_db),
             session_name=drunc_config.session,
-            op_env=drunc_config.op_env,
-            connectivity_service_is_infrastructure_app=drunc_config.drunc_connsvc,
-            disable_connectivity_service=disable_connectivity_service,
+            connsvc_port=drunc_config.connsvc_port, # Default is 0, which causes random port to be selected
         )
 
-    consolidate_db(str(temp_config_db), str(config_db))
+    with timeline.phase("open_config_db"):
+        dal = conffwk.dal.module("generated", "schema/appmodel/fdmodules.schema.xml")
+        db = conffwk.Configuration("oksconflibs:" + str(config_db))
 
-    drunc_config.connsvc_port = set_connectivity_service_port(
-        oksfile=str(config_db),
-        session_name=drunc_config.session,
-        connsvc_port=drunc_config.connsvc_port, # Default is 0, which causes random port to be selected
-    )
-
-    dal = conffwk.dal.module("generated", "schema/appmodel/fdmodules.schema.xml")
-    db = conffwk.Configuration("oksconflibs:" + str(config_db))
-
-    def apply_update(obj, substitution):
-        for name, value in substitution.updates.items():
-            setattr(obj, name, value)
-
-        db.update_dal(obj)
+    # (the substitutions are already present in a cached configuration)
+    if not config_is_cached:
+        with timeline.phase("config_substitutions"):
+            apply_config_substitutions(db, drunc_config.config_substitutions)
+        with timeline.phase("conffwk_commit"):
+            db.commit()
 
-    for substitution in drunc_config.config_substitutions:
-        if substitution.obj_id != "*":
-            obj = db.get_dal(class_name=substitution.obj_class, uid=substitution.obj_id)
-            apply_update(obj, substitution)
-        else:
-            objs = db.get_dals(class_name=substitution.obj_class)
-            for obj in objs:
-                apply_update(obj, substitution)
+        if cached_config_db is not None:
+            store_cached_config(config_db, cached_config_db)
 
-    db.commit()
+    # 18-Oct-2026: the data writers write into new subdirectories of their configured
+    # directories, instead of the files of earlier tests being moved out of the way
+    with timeline.phase("isolate_data_directories"):
+        isolate_data_writer_directories(db, data_directory_janitor)
+    with timeline.phase("conffwk_commit"):
+        db.commit()
 
     # For preconfigured tests, disable starting the ConnSvc if the ConnectionService is an ifapp or unused
     sessionobj = db.get_dal(class_name="Session", uid=drunc_config.session)
@@ -205,28 +445,33 @@ def create_config_files(request, tmp_path_factory):
             drunc_config.drunc_connsvc = True
 
     # 30-Dec-2024, KAB: build up the list of directories used for writing raw and TPStream data
-    rawdata_dirs = []
-    tpstream_dirs = []
+    # 18-Oct-2026: the applications of each relevant class are indexed once, by UID,
+    # instead of trying (and failing) to look up every application as every class
+    app_dals = {
+        class_name: {dal.id: dal for dal in db.get_dals(class_name=class_name)}
+        for class_name in data_writer_app_classes
+    }
     segment = sessionobj.segment
     app_list = get_segment_apps(segment)
-    for app in app_list:
-        try:
-            dfapp = db.get_dal(class_name="DFApplication", uid=app)
-            for dw in dfapp.data_writers:
-                outdir = dw.data_store_params.directory_path
-                if outdir not in rawdata_dirs:
-                    rawdata_dirs.append(outdir)
-        except:
-            # not a DFApplication, so simply continue to the next app
-            pass
-        try:
-            tpswapp = db.get_dal(class_name="TPStreamWriterApplication", uid=app)
-            outdir = tpswapp.tp_writer.data_store_params.directory_path
-            if outdir not in tpstream_dirs:
-                tpstream_dirs.append(outdir)
-        except:
-            # not a TPStreamWriterApplication, so simply continue to the next app
-            pass
+    apps_by_class = {
+        class_name: [app for app in app_list if app in app_dals[class_name]]
+        for class_name in data_writer_app_classes
+    }
+    rawdata_dirs = list(
+        dict.fromkeys(
+            dw.data_store_params.directory_path
+            for app in apps_by_class["DFApplication"]
+            for dw in app_dals["DFApplication"][app].data_writers
+        )
+    )
+    tpstream_dirs = list(
+        dict.fromkeys(
+            app_dals["TPStreamWriterApplication"][
+                app
+            ].tp_writer.data_store_params.directory_path
+            for app in apps_by_class["TPStreamWriterApplication"]
+        )
+    )
 
     result = CreateConfigResult(
         config=drunc_config,
@@ -235,13 +480,249 @@ def create_config_files(request, tmp_path_factory):
         log_file=logfile,
         data_dirs=rawdata_dirs,
         tpstream_data_dirs=tpstream_dirs,
+        apps_by_class=apps_by_class,
+        timeline=timeline,
     )
+    timeline.save(config_dir / "phase_timeline.json")
 
     yield result
 
 
+# The ScheduledSessions of the concurrent runs, for each configuration file, or
+# the exception if they couldn't be run
+scheduled_sessions = {}
+
+
+def get_connectivity_service(pool, drunc_config, port):
+    try:
+        return pool.get(port, drunc_config.connsvc_debug_level)
+    except RuntimeError as err:
+        pytest.fail(str(err))
+
+
+def terminate_process_group(process):
+    "Send SIGTERM to the process group of process, which was started in a new session"
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+    except ProcessLookupError:
+        pass
+
+
+def release_connectivity_service(pool, connectivity_service, run_dir, session):
+    pool.release(
+        connectivity_service,
+        session,
+        run_dir / f"log_{getpass.getuser()}_{session}_connectivity-service.log",
+    )
+
+
+def data_writer_store_params(db):
+    """Return the (distinct) data_store_params objects of the data writers in db"""
+    store_params = [
+        dw.data_store_params
+        for dfapp in db.get_dals(class_name="DFApplication")
+        for dw in dfapp.data_writers
+    ] + [
+        tpswapp.tp_writer.data_store_params
+        for tpswapp in db.get_dals(class_name="TPStreamWriterApplication")
+    ]
+    return list({params.id: params for params in store_params}.values())
+
+
+def isolate_data_writer_directories(db, janitor):
+    """Point the data writers in db (without committing) at new subdirectories of
+    their current directories, and return a dictionary from each old directory to
+    its new one. Relative directories are left alone, since they are inside the
+    run directory of each run anyway
+
+    """
+    new_dirs = {}
+    for params in data_writer_store_params(db):
+        old_dir = params.directory_path
+        if not os.path.isabs(old_dir):
+            continue
+        if old_dir not in new_dirs:
+            new_dirs[old_dir] = make_isolated_data_dir(old_dir)
+            janitor.add(new_dirs[old_dir])
+        params.directory_path = new_dirs[old_dir]
+        db.update_dal(params)
+    return new_dirs
+
+
+def make_session_config(config_file, session_config_file, session, new_session, data_dir):
+    """Write a copy of config_file in which the Session is renamed to new_session
+    and all of the data writers write to data_dir, so that it can be run at the
+    same time as other copies
+
+    """
+    session_ref_re = re.compile(r'(class="Session" id=")' + re.escape(session) + '"')
+    config_text = pathlib.Path(config_file).read_text()
+    session_config_file.write_text(
+        session_ref_re.sub(lambda m: m.group(1) + new_session + '"', config_text)
+    )
+
+    db = conffwk.Configuration("oksconflibs:" + str(session_config_file))
+    for params in data_writer_store_params(db):
+        params.directory_path = str(data_dir)
+        db.update_dal(params)
+    db.commit()
+
+
+def run_concurrent_sessions(
+    create_config_result,
+    all_command_lists,
+    nanorc_args,
+    connectivity_service_pool,
+    tmp_path_factory,
+    max_concurrent_sessions,
+    disable_connectivity_service,
+):
+    """Run one drunc session for each of the command lists, at most
+    max_concurrent_sessions at a time. Each session gets its own run
+    directory, session name, connectivity service port and copy of the
+    configuration, whose data writers write to the run directory
+
+    """
+    drunc_config = create_config_result.config
+    sessions = []
+    # the connectivity services taken from the pool are given back even if a
+    # session can't be set up or run
+    try:
+        for index, command_list in enumerate(all_command_lists):
+            run_dir = tmp_path_factory.mktemp("run")
+            session = f"{drunc_config.session}-{index}"
+            session_config_file = (
+                pathlib.Path(create_config_result.config_dir)
+                / f"{session}-resolved.data.xml"
+            )
+            make_session_config(
+                create_config_result.config_file,
+                session_config_file,
+                drunc_config.session,
+                session,
+                run_dir,
+            )
+            port = set_connectivity_service_port(
+                oksfile=str(session_config_file),
+                session_name=session,
+                connsvc_port=0,  # a random port, so that the sessions don't share one
+            )
+            connectivity_service = None
+            if not disable_connectivity_service and not drunc_config.drunc_connsvc:
+                connectivity_service = get_connectivity_service(
+                    connectivity_service_pool, drunc_config, port
+                )
+            sessions.append(
+                ScheduledSession(
+                    args=nanorc_args + [str(session_config_file), session] + command_list,
+                    run_dir=run_dir,
+                    output_file=run_dir / "drunc_output.txt",
+                    session=session,
+                    config_file=session_config_file,
+                    connectivity_service=connectivity_service,
+                )
+            )
+
+        print(
+            f"Running {len(sessions)} drunc sessions, at most {max_concurrent_sessions} at a time",
+            flush=True,
+        )
+        run_sessions(sessions, max_concurrent_sessions)
+    finally:
+        for scheduled_session in sessions:
+            if scheduled_session.connectivity_service is not None:
+                release_connectivity_service(
+                    connectivity_service_pool,
+                    scheduled_session.connectivity_service,
+                    scheduled_session.run_dir,
+                    scheduled_session.session,
+                )
+    return sessions
+
+
+_artifact_order_re = re.compile(r"_run(\d+)_(\d+)_")
+
+
+def artifact_sort_key(path):
+    "Sort key for data files, by run number, then file index, then name"
+    match_obj = _artifact_order_re.search(path.name)
+    if match_obj:
+        return (int(match_obj.group(1)), int(match_obj.group(2)), path.name)
+    return (-1, -1, path.name)
+
+
+def discover_run_artifacts(run_dir, rawdata_dirs, tpset_dirs, op_env):
+    """Find the raw data, TPStream, log and opmon files of a run, with one os.scandir
+    pass over each directory, and return them as sorted lists, along with a dictionary
+    of the FileStat of each file
+
+    """
+    artifacts = {"data": [], "tpset": [], "log": [], "opmon": []}
+    file_stats = {}
+    for directory in dict.fromkeys([run_dir] + rawdata_dirs + tpset_dirs):
+        patterns = []
+        if directory in rawdata_dirs:
+            patterns.append(("data", f"{op_env}_raw_*.hdf5"))
+        if directory in tpset_dirs:
+            patterns.append(("tpset", f"{op_env}_tp_*.hdf5"))
+        if directory == run_dir:
+            patterns += [("log", "log_*.txt"), ("log", "log_*.log"), ("opmon", "info_*.json")]
+        try:
+            entries = os.scandir(directory)
+        except FileNotFoundError:
+            continue
+        with entries:
+            for entry in entries:
+                for category, pattern in patterns:
+                    if fnmatch.fnmatchcase(entry.name, pattern):
+                        path = directory / entry.name
+                        entry_stat = entry.stat()
+                        file_stats[path] = FileStat(entry_stat.st_size, entry_stat.st_mtime)
+                        artifacts[category].append(path)
+                        break
+    return (
+        sorted(artifacts["data"], key=artifact_sort_key),
+        sorted(artifacts["tpset"], key=artifact_sort_key),
+        sorted(artifacts["log"]),
+        sorted(artifacts["opmon"]),
+        file_stats,
+    )
+
+
+@pytest.fixture(scope="session")
+def data_directory_janitor():
+    """Removes data directories left over from earlier test sessions, in the
+    background, while the tests run
+
+    """
+    janitor = DataDirectoryJanitor()
+    janitor.start()
+    yield janitor
+    janitor.stop()
+
+
+@pytest.fixture(scope="session")
+def connectivity_service_pool(request, tmp_path_factory):
+    """The Connectivity Services used by the runs in this pytest session, which are
+    started when they are first needed and stopped at the end of the session
+
+    """
+    pool = ConnectivityServicePool(
+        tmp_path_factory.mktemp("connectivity_service"),
+        startup_timeout=request.config.getoption("--connsvc-startup-timeout"),
+    )
+    yield pool
+    pool.stop_all()
+
+
 @pytest.fixture(scope="module")
-def run_nanorc(request, create_config_files, tmp_path_factory):
+def run_nanorc(
+    request,
+    create_config_files,
+    connectivity_service_pool,
+    data_directory_janitor,
+    tmp_path_factory,
+):
     """Run nanorc with the OKS DB files created by `create_config_files`. The
     commands specified by the `nanorc_command_list` variable in the
     test module are executed. If `nanorc_command_list`'s items are
@@ -255,35 +736,6 @@ def run_nanorc(request, create_config_files, tmp_path_factory):
         "--disable-connectivity-service"
     )
 
-    run_dir = tmp_path_factory.mktemp("run")
-
-    connsvc_obj = None
-    if (
-        not disable_connectivity_service
-        and not create_config_files.config.drunc_connsvc
-    ):
-        # start connsvc
-        print(
-            f"Starting Connectivity Service on port {create_config_files.config.connsvc_port}"
-        )
-
-        connsvc_env = os.environ.copy()
-        connsvc_env["CONNECTION_FLASK_DEBUG"] = str(
-            create_config_files.config.connsvc_debug_level
-        )
-
-        connsvc_log = open(
-            run_dir
-            / f"log_{getpass.getuser()}_{create_config_files.config.session}_connectivity-service.log",
-            "w",
-        )
-        connsvc_obj = subprocess.Popen(
-            f"gunicorn -b 0.0.0.0:{create_config_files.config.connsvc_port} --workers=1 --worker-class=gthread --threads=2 --timeout 5000000000 --log-level=info connection-service.connection-flask:app".split(),
-            stdout=connsvc_log,
-            stderr=connsvc_log,
-            env=connsvc_env,
-        )
-
     nanorc = request.config.getoption("--nanorc-path")
     if nanorc is None:
         nanorc = "drunc-unified-shell"
@@ -300,97 +752,205 @@ def run_nanorc(request, create_config_files, tmp_path_factory):
                 nanorc_option_strings.append("--" + opt[0])
                 if len(opt) == 2:
                     nanorc_option_strings.append(opt[1])
+    nanorc_args = [nanorc] + nanorc_option_strings + [str("ssh-standalone")]
+
+    # 18-Oct-2026: the time taken by each phase of the run is recorded
+    timeline = PhaseTimeline(f"{request.module.__name__} run{request.param_index}")
+
+    # 18-Oct-2026: with --max-concurrent-sessions, all of the runs for this
+    # configuration are done together, when the first of them is requested
+    scheduled_session = None
+    all_command_lists = items_as_params(getattr(request.module, "nanorc_command_list"))
+    max_concurrent_sessions = request.config.getoption("--max-concurrent-sessions")
+    if max_concurrent_sessions > 1 and len(all_command_lists) > 1:
+        config_key = str(create_config_files.config_file)
+        if config_key not in scheduled_sessions:
+            concurrent_phase = timeline.start("concurrent_drunc_sessions")
+            try:
+                scheduled_sessions[config_key] = run_concurrent_sessions(
+                    create_config_files,
+                    all_command_lists,
+                    nanorc_args,
+                    connectivity_service_pool,
+                    tmp_path_factory,
+                    max_concurrent_sessions,
+                    disable_connectivity_service,
+                )
+            except BaseException as err:  # including pytest.fail()
+                # the other runs of this configuration fail with the same error,
+                # instead of starting all of the sessions again
+                scheduled_sessions[config_key] = err
+                raise
+            timeline.stop(concurrent_phase)
+        if isinstance(scheduled_sessions[config_key], BaseException):
+            pytest.fail(
+                f"The concurrent drunc sessions for this configuration failed: {scheduled_sessions[config_key]}"
+            )
+        scheduled_session = scheduled_sessions[config_key][request.param_index]
 
-    class RunResult:
-        pass
+    if scheduled_session is not None:
+        run_dir = scheduled_session.run_dir
+        connectivity_service = scheduled_session.connectivity_service
+        session = scheduled_session.session
+    else:
+        run_dir = tmp_path_factory.mktemp("run")
+        connectivity_service = None
+        session = create_config_files.config.session
+        if (
+            not disable_connectivity_service
+            and not create_config_files.config.drunc_connsvc
+        ):
+            # 18-Oct-2026: the connsvc is taken from the session-wide pool, so it is only
+            # started (and waited for) by the first run that uses its port
+            with timeline.phase("connsvc_startup"):
+                connectivity_service = get_connectivity_service(
+                    connectivity_service_pool,
+                    create_config_files.config,
+                    create_config_files.config.connsvc_port,
+                )
+
+    # 18-Oct-2026: each run writes its data into new directories, so the configuration
+    # is updated for every run after the first one that uses it
+    if scheduled_session is None:
+        if create_config_files.run_count > 0:
+            isolate_phase = timeline.start("isolate_data_directories")
+            db = conffwk.Configuration(
+                "oksconflibs:" + str(create_config_files.config_file)
+            )
+            new_dirs = isolate_data_writer_directories(db, data_directory_janitor)
+            db.commit()
+            create_config_files.data_dirs = [
+                new_dirs.get(d, d) for d in create_config_files.data_dirs
+            ]
+            create_config_files.tpstream_data_dirs = [
+                new_dirs.get(d, d) for d in create_config_files.tpstream_data_dirs
+            ]
+            timeline.stop(isolate_phase)
+        create_config_files.run_count += 1
 
     # 28-Jun-2022, KAB: added the ability to handle a non-standard output directory
     rawdata_dirs = [run_dir]
     rawdata_paths = create_config_files.data_dirs
     tpset_dirs = [run_dir]
     tpset_paths = create_config_files.tpstream_data_dirs
+    if scheduled_session is not None:
+        # (concurrent sessions write their data into their run directories)
+        rawdata_paths = []
+        tpset_paths = []
 
     for path in rawdata_paths:
         rawdata_dir = pathlib.Path(path)
         if rawdata_dir not in rawdata_dirs:
             rawdata_dirs.append(rawdata_dir)
-        # deal with any pre-existing data files
-        temp_suffix = ".temp_saved"
-        now = time.time()
-        for file_obj in rawdata_dir.glob(
-            f"{create_config_files.config.op_env}_raw*.hdf5"
-        ):
-            print(f"Renaming raw data file from earlier test: {str(file_obj)}")
-            new_name = str(file_obj) + temp_suffix
-            file_obj.rename(new_name)
-        for file_obj in rawdata_dir.glob(
-            f"{create_config_files.config.op_env}_raw*.hdf5{temp_suffix}"
-        ):
-            modified_time = file_obj.stat().st_mtime
-            if (now - modified_time) > 3600:
-                print(f"Deleting raw data file from earlier test: {str(file_obj)}")
-                file_obj.unlink(True)  # missing is OK
     for tpset_path in tpset_paths:
         tpset_dir = pathlib.Path(tpset_path)
         if tpset_dir not in tpset_dirs:
             tpset_dirs.append(tpset_dir)
-        # deal with any pre-existing data files
-        temp_suffix = ".temp_saved"
-        now = time.time()
-        for file_obj in tpset_dir.glob(
-            f"{create_config_files.config.op_env}_tp*.hdf5"
-        ):
-            print(f"Renaming TP data file from earlier test: {str(file_obj)}")
-            new_name = str(file_obj) + temp_suffix
-            file_obj.rename(new_name)
-        for file_obj in tpset_dir.glob(
-            f"{create_config_files.config.op_env}_tp*.hdf5{temp_suffix}"
-        ):
-            modified_time = file_obj.stat().st_mtime
-            if (now - modified_time) > 3600:
-                print(f"Deleting TP data file from earlier test: {str(file_obj)}")
-                file_obj.unlink(True)  # missing is OK
 
     print(
         "++++++++++ DRUNC Run BEGIN ++++++++++", flush=True
     )  # Apparently need to flush before subprocess.run
     result = RunResult()
-    result.completed_process = subprocess.run(
-        [nanorc]
-        + nanorc_option_strings
-        + [str("ssh-standalone")]
-        + [str(create_config_files.config_file)]
-        + [str(create_config_files.config.session)]
-        + command_list,
-        cwd=run_dir,
-    )
+    aborted_sessions = []
+    if scheduled_session is not None:
+        # (the session has already been run, so just show its output)
+        print(scheduled_session.output_file.read_text(), end="", flush=True)
+        result.completed_process = scheduled_session.completed_process
+        result.log_watcher = None
+        result.data_file_watcher = None
+    else:
+        drunc_phase = timeline.start("drunc_session")
+        drunc_process = subprocess.Popen(
+            nanorc_args
+            + [str(create_config_files.config_file)]
+            + [str(session)]
+            + command_list,
+            cwd=run_dir,
+            # in its own process group, so that an abort reaches the processes that
+            # the shell started as well as the shell itself
+            start_new_session=True,
+        )
 
-    if connsvc_obj is not None:
-        connsvc_obj.send_signal(2)
-        connsvc_obj.kill()
+        def abort_drunc_session():
+            aborted_sessions.append(session)
+            terminate_process_group(drunc_process)
+
+        # 18-Oct-2026: optionally follow the log files while the session runs, so that
+        # problems are found (and, if requested, the session is aborted) without waiting
+        # for the full set of commands to complete
+        log_watcher = None
+        abort_on_log_problem = request.config.getoption("--log-watcher-abort")
+        if request.config.getoption("--log-watcher") or abort_on_log_problem:
+            log_watcher = LogWatcher(
+                run_dir,
+                getattr(request.module, "ignored_logfile_problems", {}),
+                getattr(request.module, "required_logfile_messages", {}),
+                abort_function=abort_drunc_session if abort_on_log_problem else None,
+            )
+            log_watcher.start()
+
+        # 18-Oct-2026: optionally check the raw data files as the data writers close them,
+        # using the checks in the `streaming_data_file_checks` variable of the test module
+        data_file_watcher = None
+        streaming_data_file_checks = getattr(request.module, "streaming_data_file_checks", [])
+        if request.config.getoption("--data-file-watcher") and len(streaming_data_file_checks) > 0:
+            # only imported when needed, since it brings in the HDF5 libraries
+            from integrationtest.data_file_checks import DataFileWatcher
+
+            data_file_watcher = DataFileWatcher(
+                rawdata_dirs,
+                f"{create_config_files.config.op_env}_raw_*.hdf5",
+                streaming_data_file_checks,
+            )
+            data_file_watcher.start()
+
+        try:
+            drunc_process.wait()
+        except KeyboardInterrupt:
+            # (the session no longer gets the terminal's Ctrl-C itself)
+            terminate_process_group(drunc_process)
+            raise
+        timeline.stop(drunc_phase)
+        result.completed_process = subprocess.CompletedProcess(
+            drunc_process.args, drunc_process.returncode
+        )
+        if log_watcher is not None:
+            log_watcher.stop()
+        result.log_watcher = log_watcher
+        if data_file_watcher is not None:
+            data_file_watcher.stop()
+        result.data_file_watcher = data_file_watcher
+        if connectivity_service is not None:
+            release_connectivity_service(
+                connectivity_service_pool, connectivity_service, run_dir, session
+            )
 
-    if create_config_files.config.attempt_cleanup:
+    # an aborted session can leave its controllers running, even without attempt_cleanup
+    if create_config_files.config.attempt_cleanup or len(aborted_sessions) > 0:
         print(
             "Checking for remaining gunicorn and drunc-controller processes", flush=True
         )
-        subprocess.run(["killall", "gunicorn", "drunc-controller"])
+        with timeline.phase("cleanup"):
+            subprocess.run(["killall", "gunicorn", "drunc-controller"])
 
     result.confgen_config = create_config_files.config
-    result.session = create_config_files.config.session
+    result.connectivity_service = connectivity_service
+    result.session = session
     result.nanorc_commands = command_list
     result.run_dir = run_dir
     result.config_dir = create_config_files.config_dir
-    result.data_files = []
-    for rawdata_dir in rawdata_dirs:
-        result.data_files += list(
-            rawdata_dir.glob(f"{create_config_files.config.op_env}_raw_*.hdf5")
-        )
-    result.tpset_files = []
-    for tpset_dir in tpset_dirs:
-        result.tpset_files += list(
-            tpset_dir.glob(f"{create_config_files.config.op_env}_tp_*.hdf5")
-        )
-    result.log_files = list(run_dir.glob("log_*.txt")) + list(run_dir.glob("log_*.log"))
-    result.opmon_files = list(run_dir.glob("info_*.json"))
+    discovery_phase = timeline.start("artifact_discovery")
+    (
+        result.data_files,
+        result.tpset_files,
+        result.log_files,
+        result.opmon_files,
+        result.file_stats,
+    ) = discover_run_artifacts(
+        run_dir, rawdata_dirs, tpset_dirs, create_config_files.config.op_env
+    )
+    timeline.stop(discovery_phase)
+    result.timeline = timeline
+    timeline.save(run_dir / "phase_timeline.json", config=create_config_files.timeline)
     print("---------- DRUNC Run END ----------", flush=True)
     yield result
@@ -1,71 +1,305 @@
 from glob import glob
+import concurrent.futures
+import copy
+import io
+import locale
+import mmap
+import multiprocessing
+import os
+import pathlib
 import re
+import threading
 
-def log_has_no_errors(log_file_name, print_logfilename_for_problems=True, excluded_substring_list=[], required_substring_list=[], print_required_message_report=False):
-    ok=True
-    ignored_problem_count=0
-    required_counts={ss:0 for ss in required_substring_list}
-    for line in open(log_file_name, errors='ignore').readlines():
+# 18-Oct-2026: log_has_no_errors is now backed by a LogScanner, which compiles the
+# line-prefix matcher, the bad-word test, and the excluded/required phrases once per
+# file and reads the file once, in chunks.  Rather than running every regex on every
+# line, each chunk is searched as a whole for the lines that could possibly matter
+# (lines that contain one of the bad words, or that match one of the required phrases),
+# and only those lines are examined individually, using exactly the same rules as before.
+
+# For lines produced with our logging package, the first two words in the line are the
+# date and time, then the severity
+_logline_prefix_re = re.compile(r"20[0-9][0-9]-[A-Z][a-z][a-z]-[0-9]+\s+[0-9:,]+\s+([A-Z]+)")
+_bad_severities = ("WARNING", "ERROR", "FATAL")
+# Every line that can be flagged as a problem contains one of these words (the bad
+# severities included), so they are also used to find the candidate lines in a chunk
+_bad_words = ("WARN", "Warn", "warn", "ERROR", "Error", "error", "FATAL", "Fatal", "fatal", "egmentation fault")
+
+# Phrases that use these constructs can give a different answer when searched for
+# within a multi-line chunk than when searched for within a single line
+_chunk_unsafe_re = re.compile(r"\\[AZ]|\(\?<?[=!]")
+_backreference_re = re.compile(r"\\[1-9]|\(\?P=")
+# Inline global flags, e.g. (?i), apply to the whole pattern that they are in (before
+# Python 3.11, even when they are not at its start), so they would change the meaning
+# of a combined pattern, or of a chunk-wide search with (?s)
+_inline_global_flags_re = re.compile(r"\(\?[aiLmsux]+\)")
+
+_log_scan_chunk_size = 4 * 1024 * 1024
+_log_scan_mmap_window_size = 1024 * 1024
+
+# Words that make a problem line serious enough for a LogWatcher to abort the run
+_abort_words = ("ERROR", "Error", "error", "FATAL", "Fatal", "fatal", "egmentation fault")
+
+# Progress of LogWatchers through the logfiles that they have followed, keyed by the real
+# path of the logfile: (LogScanner, offset of the first byte not yet scanned).  The
+# watcher threads update the dictionary, and the scanners in it, while holding the lock
+_watched_logs = {}
+_watched_logs_lock = threading.Lock()
+
+# Defaults used by logs_are_error_free, set from the --log-check-workers and
+# --log-check-mmap pytest options
+log_check_workers = 1
+log_check_use_mmap = False
+
+
+def _combine_patterns(patterns):
+    """Compile a list of regular expressions into a single alternation, or return
+    None if that can't be done without changing the meaning of the patterns"""
+    if len(patterns) == 0:
+        return None
+    if any(_backreference_re.search(p) or _inline_global_flags_re.search(p) for p in patterns):
+        return None
+    try:
+        return re.compile("|".join(f"(?:{p})" for p in patterns))
+    except re.error:
+        return None
+
+
+def _add_literal_line_starts(buf, word, line_starts, begin=0, end=None):
+    """Add the start of every line in buf[begin:end] that contains word to line_starts.
+    buf may be a str, or a bytes-like object such as an mmap."""
+    newline = "\n" if isinstance(buf, str) else b"\n"
+    if end is None:
+        end = len(buf)
+    pos = buf.find(word, begin, end)
+    while pos >= 0:
+        line_starts.add(buf.rfind(newline, begin, pos) + 1 or begin)
+        line_end = buf.find(newline, pos, end)
+        if line_end < 0:
+            return
+        pos = buf.find(word, line_end + 1, end)
+
+
+def _add_regex_line_starts(buf, pattern, line_starts, begin=0, end=None):
+    """As _add_literal_line_starts, for a compiled regular expression.  After a match,
+    the search restarts at the beginning of the following line, so that a match which
+    runs past the end of its line can't hide a match that starts on the next one."""
+    newline = "\n" if isinstance(buf, str) else b"\n"
+    if end is None:
+        end = len(buf)
+    pos = begin
+    while pos < end:
+        match_obj = pattern.search(buf, pos, end)
+        if not match_obj:
+            return
+        line_starts.add(max(pos, buf.rfind(newline, pos, match_obj.start()) + 1))
+        line_end = buf.find(newline, match_obj.start(), end)
+        if line_end < 0:
+            return
+        pos = line_end + 1
 
-        # First check if the line appears to be in the standard format of messages produced with our logging package
-        # For lines produced with our logging package, the first two words in the line are the date and time, then the severity
 
-        bad_line=False
-        match_logline_prefix = re.search(r"^20[0-9][0-9]-[A-Z][a-z][a-z]-[0-9]+\s+[0-9:,]+\s+([A-Z]+)", line)
+def _iter_line_spans(text):
+    start = 0
+    text_length = len(text)
+    while start < text_length:
+        end = text.find("\n", start)
+        end = text_length if end < 0 else end + 1
+        yield start, end
+        start = end
+
+
+class LogScanner:
+    """Checks the lines of a single log file for problems and for required messages.
+
+    Text is fed to the scanner with scan_text() (or a whole file with scan_file()), and
+    the findings accumulate in problem_lines, ignored_problem_count and required_counts
+    until report() is called."""
+
+    def __init__(self, excluded_substring_list=[], required_substring_list=[]):
+        self.excluded_substring_list = list(excluded_substring_list)
+        self.required_substring_list = list(required_substring_list)
+        self.problem_lines = []
+        self.ignored_problem_count = 0
+        self.required_counts = {ss: 0 for ss in self.required_substring_list}
+
+        self._excluded_res = [re.compile(ss) for ss in self.excluded_substring_list]
+        self._excluded_any_re = _combine_patterns(self.excluded_substring_list)
+        self._required_res = [(ss, re.compile(ss)) for ss in self.required_substring_list]
+        self._required_any_re = _combine_patterns(self.required_substring_list)
+
+        # Lines that need a closer look are found by searching whole chunks for the bad
+        # words and for each required phrase.  If any required phrase can't safely be
+        # searched for in a chunk, every line is examined instead.
+        self._required_chunk_res = [re.compile(ss, re.MULTILINE) for ss in set(self.required_substring_list)]
+        self._examine_every_line = any(_chunk_unsafe_re.search(ss) or _inline_global_flags_re.search(ss) for ss in self.required_substring_list)
+
+    def _line_is_excluded(self, line):
+        if self._excluded_any_re is not None:
+            return self._excluded_any_re.search(line) is not None
+        return any(ex_re.search(line) for ex_re in self._excluded_res)
+
+    def _line_has_required(self, line):
+        if self._required_any_re is not None:
+            return self._required_any_re.search(line) is not None
+        return any(req_re.search(line) for (ss, req_re) in self._required_res)
+
+    def _candidate_line_spans(self, text):
+        """Return the (start, end) of each line in text that needs a closer look, in order"""
+        if self._examine_every_line:
+            return list(_iter_line_spans(text))
+        line_starts = set()
+        for word in _bad_words:
+            _add_literal_line_starts(text, word, line_starts)
+        for req_re in self._required_chunk_res:
+            _add_regex_line_starts(text, req_re, line_starts)
+        spans = []
+        for start in sorted(line_starts):
+            end = text.find("\n", start)
+            spans.append((start, len(text) if end < 0 else end + 1))
+        return spans
+
+    def check_line(self, line):
+        """Apply the problem and required-message rules to a single line"""
+        bad_line = False
+        # First check if the line appears to be in the standard format of messages produced with our logging package
+        match_logline_prefix = _logline_prefix_re.match(line)
         if match_logline_prefix:
-            severity=match_logline_prefix.group(1)
-            if severity in ("WARNING", "ERROR", "FATAL"):
-                bad_line=True
-        else: # This line's not produced with our logging package, so let's just look for bad words
-            if "WARN" in line or "Warn" in line or "warn" in line or \
-               "ERROR" in line or "Error" in line or "error" in line or \
-               "FATAL" in line or "Fatal" in line or "fatal" in line or \
-               "egmentation fault" in line:
-                bad_line=True
-
-        if bad_line:
-            ignore_this_problem=False
-            for excluded_substring in excluded_substring_list:
-                match_obj = re.search(excluded_substring, line)
-                if match_obj:
-                    ignore_this_problem=True
-                    break
-            if ignore_this_problem:
-                bad_line=False
-                ignored_problem_count+=1
-        if bad_line:
-            for substr in required_substring_list:
-                match_obj = re.search(substr, line)
-                if match_obj:
-                    bad_line=False
+            if match_logline_prefix.group(1) in _bad_severities:
+                bad_line = True
+        elif any(word in line for word in _bad_words): # This line's not produced with our logging package, so let's just look for bad words
+            bad_line = True
+
+        if bad_line and self._line_is_excluded(line):
+            bad_line = False
+            self.ignored_problem_count += 1
+
+        has_required = len(self._required_res) > 0 and self._line_has_required(line)
+        if bad_line and not has_required:
+            self.problem_lines.append(line)
+        if has_required:
+            for (substr, req_re) in self._required_res:
+                if req_re.search(line):
+                    self.required_counts[substr] += 1
+        return bad_line and not has_required
+
+    def scan_text(self, text):
+        """Scan text that consists of complete lines (only the final line of a file may
+        be missing its newline)"""
+        for (start, end) in self._candidate_line_spans(text):
+            self.check_line(text[start:end])
+
+    def scan_file(self, log_file_name, chunk_size=_log_scan_chunk_size, offset=0):
+        """Scan a file in text mode, starting at byte offset (which must be the start of
+        a line)"""
+        with open(log_file_name, 'rb') as raw_file:
+            raw_file.seek(offset)
+            log_file = io.TextIOWrapper(raw_file, errors='ignore')
+            leftover = ""
+            while True:
+                chunk = log_file.read(chunk_size)
+                if not chunk:
                     break
-        if bad_line:
+                chunk = leftover + chunk
+                split_point = chunk.rfind("\n") + 1
+                leftover = chunk[split_point:]
+                self.scan_text(chunk[:split_point])
+            if leftover:
+                self.scan_text(leftover)
+
+    def scan_file_mmap(self, log_file_name, window_size=_log_scan_mmap_window_size, offset=0):
+        """Scan a file by memory-mapping it and searching the raw bytes, one window of the
+        mapping at a time.
+
+        Only the lines that contain a bad word or match a required phrase are decoded,
+        so memory use does not grow with the size of the file.  Windows that contain
+        carriage returns are decoded as a whole, to reproduce the newline handling of
+        scan_file().  The verdicts are the same as those of scan_file() for text that
+        is valid in the locale encoding; required phrases that use character classes
+        such as \\w or \\d are matched against the bytes with ASCII semantics.  If a
+        required phrase can't be used as a bytes pattern, the file is scanned with
+        scan_file() instead."""
+        encoding = locale.getpreferredencoding(False)
+        # a lower-cased copy of each window is searched for the lower-case forms of the
+        # bad words, which is quicker than searching for every spelling separately
+        bad_words = sorted(set(word.lower().encode(encoding) for word in _bad_words))
+        try:
+            required_res = [re.compile(ss.encode(encoding), re.MULTILINE) for ss in set(self.required_substring_list)]
+        except (re.error, UnicodeEncodeError):
+            # a phrase that can't be searched for in the bytes, e.g. one that uses a \u
+            # or \N{...} escape, which bytes patterns don't support
+            self.scan_file(log_file_name, offset=offset)
+            return
+        with open(log_file_name, 'rb') as log_file:
+            file_size = os.fstat(log_file.fileno()).st_size
+            if file_size == 0:
+                return
+            with mmap.mmap(log_file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if hasattr(mm, "madvise") and hasattr(mmap, "MADV_SEQUENTIAL"):
+                    mm.madvise(mmap.MADV_SEQUENTIAL)
+                released = (offset // mmap.PAGESIZE) * mmap.PAGESIZE
+                begin = offset
+                while begin < file_size:
+                    # each window ends at a line boundary (or the end of the file)
+                    end = mm.rfind(b"\n", begin, begin + window_size) + 1
+                    if end <= begin or begin + window_size >= file_size:
+                        end = mm.find(b"\n", begin + window_size)
+                        end = file_size if end < 0 else end + 1
+                    window = mm[begin:end]
+                    if self._examine_every_line or window.find(b"\r") >= 0:
+                        text = window.decode(encoding, errors='ignore')
+                        self.scan_text(text.replace("\r\n", "\n").replace("\r", "\n"))
+                    else:
+                        line_starts = set()
+                        lowered = window.lower()
+                        for word in bad_words:
+                            _add_literal_line_starts(lowered, word, line_starts)
+                        for req_re in required_res:
+                            _add_regex_line_starts(window, req_re, line_starts)
+                        for start in sorted(line_starts):
+                            line_end = window.find(b"\n", start)
+                            line_end = len(window) if line_end < 0 else line_end + 1
+                            self.check_line(window[start:line_end].decode(encoding, errors='ignore'))
+                    # hand the pages that have been scanned back to the OS
+                    if hasattr(mm, "madvise") and hasattr(mmap, "MADV_DONTNEED"):
+                        release_to = (end // mmap.PAGESIZE) * mmap.PAGESIZE
+                        if release_to > released:
+                            mm.madvise(mmap.MADV_DONTNEED, released, release_to - released)
+                            released = release_to
+                    begin = end
+
+    def report(self, log_file_name, print_logfilename_for_problems=True, print_required_message_report=False):
+        """Print the findings in the standard format and return whether the log is OK"""
+        ok = True
+        for line in self.problem_lines:
             if ok and print_logfilename_for_problems:
                 print("----------")
                 print(f"\N{POLICE CARS REVOLVING LIGHT} Problem(s) found in logfile {log_file_name}:")
             print(line)
-            ok=False
-
-        for substr in required_substring_list:
-            match_obj = re.search(substr, line)
-            if match_obj:
-                required_counts[substr] += 1
-    if ignored_problem_count > 0:
-        print(f"\N{CONSTRUCTION SIGN} Note: problems found in {ignored_problem_count} lines in {log_file_name} were ignored based on {len(excluded_substring_list)} phrase(s). \N{CONSTRUCTION SIGN}")
-    overall_required_message_count = 0
-    found_message_count = 0
-    for (substr,count) in required_counts.items():
-        if count == 0:
-            print(f"\N{POLICE CARS REVOLVING LIGHT} Failure: Required log message \"{substr}\" was not found in {log_file_name} \N{POLICE CARS REVOLVING LIGHT}")
-            ok=False
-        elif print_required_message_report:
-            print(f"\N{WHITE HEAVY CHECK MARK} Required log message \"{substr}\" occurred {count} times in {log_file_name}")
-        overall_required_message_count += count
-        if count > 0:
-            found_message_count += 1
-    if overall_required_message_count > 0:
-        print(f"\N{WHITE HEAVY CHECK MARK} Note: required log messages were found in {overall_required_message_count} lines in {log_file_name} based on {found_message_count} required messages (of a total of {len(required_substring_list)} required messages).")
-    return ok
+            ok = False
+        if self.ignored_problem_count > 0:
+            print(f"\N{CONSTRUCTION SIGN} Note: problems found in {self.ignored_problem_count} lines in {log_file_name} were ignored based on {len(self.excluded_substring_list)} phrase(s). \N{CONSTRUCTION SIGN}")
+        overall_required_message_count = 0
+        found_message_count = 0
+        for (substr, count) in self.required_counts.items():
+            if count == 0:
+                print(f"\N{POLICE CARS REVOLVING LIGHT} Failure: Required log message \"{substr}\" was not found in {log_file_name} \N{POLICE CARS REVOLVING LIGHT}")
+                ok = False
+            elif print_required_message_report:
+                print(f"\N{WHITE HEAVY CHECK MARK} Required log message \"{substr}\" occurred {count} times in {log_file_name}")
+            overall_required_message_count += count
+            if count > 0:
+                found_message_count += 1
+        if overall_required_message_count > 0:
+            print(f"\N{WHITE HEAVY CHECK MARK} Note: required log messages were found in {overall_required_message_count} lines in {log_file_name} based on {found_message_count} required messages (of a total of {len(self.required_substring_list)} required messages).")
+        return ok
+
+
+def log_has_no_errors(log_file_name, print_logfilename_for_problems=True, excluded_substring_list=[], required_substring_list=[], print_required_message_report=False,
+                      use_mmap=False):
+    (scanner, offset) = _watched_log_progress(log_file_name, excluded_substring_list, required_substring_list)
+    scanner = _scan_log_file(log_file_name, excluded_substring_list, required_substring_list, use_mmap, scanner, offset)
+    return scanner.report(log_file_name, print_logfilename_for_problems, print_required_message_report)
 
 # 23-Nov-2021, KAB: added the ability for users to specify sets of excluded substrings, to
 # enable checking of all log files, and to print out the logfile name when there are problems.
@@ -85,29 +319,170 @@ def log_has_no_errors(log_file_name, print_logfilename_for_problems=True, exclud
 #   For example:
 #   ex_sub_map = {"ruemu": ["expected problem phrase 1", "expected problem  phrase 2"]}
 #   ex_sub_map = {"ruemu": [r"expected problem phrase \d+"]}
+#
+# 18-Oct-2026: the logfiles can optionally be checked in parallel, in a pool of worker
+# processes.  The number of workers is taken from the n_workers argument or, if that is
+# not specified, from the --log-check-workers pytest option (default 1, i.e. serial
+# checking; 0 means one worker per CPU).  Reports are always printed in the order of
+# log_file_names, and when show_all_problems is False, any checks that have not yet
+# started are cancelled as soon as a file with problems is reported.
+#
+# 18-Oct-2026: very large logfiles can be scanned with memory-mapped, bytes-level
+# searches (see LogScanner.scan_file_mmap).  This is controlled by the use_mmap argument
+# or, if that is not specified, by the --log-check-mmap pytest option.
 def logs_are_error_free(log_file_names, show_all_problems=True, print_logfilename_for_problems=True,
-                        excluded_substring_map={}, required_substring_map={}, print_required_message_report=False):
+                        excluded_substring_map={}, required_substring_map={}, print_required_message_report=False,
+                        n_workers=None, use_mmap=None):
     all_ok=True
     print("") # Clear potential dot from pytest
-    for log in log_file_names:
-        exclusions=[]
-        requireds=[]
-        for exclusion_key in excluded_substring_map.keys():
-            #print(f"Checking for match for {exclusion_key} in {log.name}")
-            match_obj = re.search(exclusion_key, log.name)
-            if match_obj:
-                exclusions += excluded_substring_map[exclusion_key]
-                break
-        for required_key in required_substring_map.keys():
-            match_obj = re.search(required_key, log.name)
-            if match_obj:
-                requireds += required_substring_map[required_key]
-                break
-        
-        single_ok=log_has_no_errors(log, print_logfilename_for_problems, exclusions, requireds, print_required_message_report)
-
-        if not single_ok:
-            all_ok=False
-            if not show_all_problems:
-                break
+    if use_mmap is None:
+        use_mmap = log_check_use_mmap
+    if n_workers is None:
+        n_workers = log_check_workers
+    if n_workers == 0:
+        n_workers = os.cpu_count()
+    n_workers = min(n_workers, len(log_file_names))
+
+    substring_lists = [_substring_lists_for_log(log, excluded_substring_map, required_substring_map) for log in log_file_names]
+    if n_workers <= 1:
+        for (log, (exclusions, requireds)) in zip(log_file_names, substring_lists):
+            single_ok=log_has_no_errors(log, print_logfilename_for_problems, exclusions, requireds, print_required_message_report, use_mmap)
+
+            if not single_ok:
+                all_ok=False
+                if not show_all_problems:
+                    break
+        return all_ok
+
+    # the workers are started with spawn rather than fork, since the pytest process has
+    # other threads (e.g. the data directory janitor) that could hold locks when it forks
+    with concurrent.futures.ProcessPoolExecutor(max_workers=n_workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+        futures = []
+        for (log, (exclusions, requireds)) in zip(log_file_names, substring_lists):
+            (scanner, offset) = _watched_log_progress(log, exclusions, requireds)
+            futures.append(executor.submit(_scan_log_file, log, exclusions, requireds, use_mmap, scanner, offset))
+        for (log, future) in zip(log_file_names, futures):
+            scanner = future.result()
+            single_ok = scanner.report(log, print_logfilename_for_problems, print_required_message_report)
+
+            if not single_ok:
+                all_ok=False
+                if not show_all_problems:
+                    executor.shutdown(wait=True, cancel_futures=True)
+                    break
     return all_ok
+
+def _substring_lists_for_log(log, excluded_substring_map, required_substring_map):
+    exclusions=[]
+    requireds=[]
+    for exclusion_key in excluded_substring_map.keys():
+        #print(f"Checking for match for {exclusion_key} in {log.name}")
+        match_obj = re.search(exclusion_key, log.name)
+        if match_obj:
+            exclusions += excluded_substring_map[exclusion_key]
+            break
+    for required_key in required_substring_map.keys():
+        match_obj = re.search(required_key, log.name)
+        if match_obj:
+            requireds += required_substring_map[required_key]
+            break
+    return (exclusions, requireds)
+
+def _scan_log_file(log_file_name, excluded_substring_list, required_substring_list, use_mmap=False, scanner=None, offset=0):
+    if scanner is None:
+        scanner = LogScanner(excluded_substring_list, required_substring_list)
+    if use_mmap:
+        scanner.scan_file_mmap(log_file_name, offset=offset)
+    else:
+        scanner.scan_file(log_file_name, offset=offset)
+    return scanner
+
+def _watched_log_progress(log_file_name, excluded_substring_list, required_substring_list):
+    """Return a copy of the scanner that a LogWatcher used for this logfile, and the
+    offset at which it stopped, if the watcher applied the same excluded and required
+    phrases.  Otherwise, return (None, 0) so that the whole file is scanned."""
+    with _watched_logs_lock:
+        progress = _watched_logs.get(os.path.realpath(log_file_name))
+        if progress is None:
+            return (None, 0)
+        (scanner, offset) = progress
+        if scanner.excluded_substring_list != list(excluded_substring_list) or \
+           scanner.required_substring_list != list(required_substring_list) or \
+           os.path.getsize(log_file_name) < offset:
+            return (None, 0)
+        return (copy.deepcopy(scanner), offset)
+
+def _is_abort_worthy(line):
+    match_logline_prefix = _logline_prefix_re.match(line)
+    if match_logline_prefix:
+        return match_logline_prefix.group(1) in ("ERROR", "FATAL")
+    return any(word in line for word in _abort_words)
+
+# 18-Oct-2026: a LogWatcher follows the logfiles in a run directory while the run is
+# still in progress, applying the same rules as logs_are_error_free.  It can optionally
+# call a function (e.g. to terminate the DAQ session) as soon as a problem that is not
+# just a warning is found.  The position that the watcher reached in each logfile is
+# recorded, so that a later log_has_no_errors or logs_are_error_free call with the same
+# excluded and required phrases only needs to scan the part of the file that the watcher
+# did not see.
+class LogWatcher(threading.Thread):
+    def __init__(self, run_dir, excluded_substring_map={}, required_substring_map={},
+                 abort_function=None, poll_interval=1.0):
+        super().__init__(name="LogWatcher", daemon=True)
+        self.run_dir = pathlib.Path(run_dir)
+        self.excluded_substring_map = excluded_substring_map
+        self.required_substring_map = required_substring_map
+        self.abort_function = abort_function
+        self.poll_interval = poll_interval
+        self.abort_reason = None
+        self._scanners = {}
+        self._offsets = {}
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.poll_interval):
+            self.poll()
+
+    def stop(self):
+        self._stop_event.set()
+        if self.is_alive():
+            self.join()
+
+    def poll(self):
+        for log in list(self.run_dir.glob("log_*.txt")) + list(self.run_dir.glob("log_*.log")):
+            key = os.path.realpath(log)
+            if key not in self._scanners:
+                (exclusions, requireds) = _substring_lists_for_log(log, self.excluded_substring_map, self.required_substring_map)
+                self._scanners[key] = LogScanner(exclusions, requireds)
+            scanner = self._scanners[key]
+            problem_count = len(scanner.problem_lines)
+            with _watched_logs_lock:
+                self._offsets[key] = self._follow(log, scanner, self._offsets.get(key, 0))
+                _watched_logs[key] = (scanner, self._offsets[key])
+            if self.abort_function is not None and self.abort_reason is None:
+                for line in scanner.problem_lines[problem_count:]:
+                    if _is_abort_worthy(line):
+                        self.abort_reason = f"{log.name}: {line.rstrip()}"
+                        print(f"\N{POLICE CARS REVOLVING LIGHT} Aborting the run because of a problem found in logfile {self.abort_reason} \N{POLICE CARS REVOLVING LIGHT}", flush=True)
+                        self.abort_function()
+                        break
+
+    def _follow(self, log, scanner, offset):
+        """Scan the complete lines that have been added to the logfile since offset, and
+        return the offset of the first byte that has not been scanned.  A line that is
+        longer than a whole chunk is scanned a chunk at a time, so that it cannot stop
+        the watcher from getting any further"""
+        encoding = locale.getpreferredencoding(False)
+        with open(log, 'rb') as log_file:
+            log_file.seek(offset)
+            while True:
+                data = log_file.read(_log_scan_chunk_size)
+                split_point = data.rfind(b"\n") + 1
+                if split_point == 0:
+                    if len(data) < _log_scan_chunk_size:
+                        return offset
+                    split_point = len(data)
+                text = data[:split_point].decode(encoding, errors='ignore')
+                scanner.scan_text(text.replace("\r\n", "\n").replace("\r", "\n"))
+                offset += split_point
+                log_file.seek(offset)
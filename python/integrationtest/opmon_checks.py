@@ -0,0 +1,239 @@
+import array
+import datetime
+import fnmatch
+import json
+import numpy
+
+# 18-Oct-2026: the opmon files of a run (run_nanorc.opmon_files) contain one JSON
+# object per line, for each publication of a set of metrics by a DAQ module, e.g.
+#   {"time": "2026-10-18T12:34:56.789Z",
+#    "origin": {"session": "integtest", "application": "df-01", "substructure": ["dw0"]},
+#    "measurement": "dunedaq.dfmodules.opmon.DataWriterInfo",
+#    "data": {"records_written": {"uint8_value": "12"}, ...}}
+# read_opmon_files reads the files one line at a time, and keeps each numeric value as
+# one row of an OpmonTable, which is a set of columns in NumPy arrays.  The application
+# of a row is the application name followed by any substructure (e.g. "df-01.dw0"), and
+# its metric is the last part of the measurement name followed by the field name (e.g.
+# "DataWriterInfo.records_written").  Applications and metrics are given as fnmatch
+# patterns to the functions below.
+
+
+class OpmonTable:
+    def __init__(self, app_codes, metric_codes, timestamps, values, app_names, metric_names):
+        self.app_codes = app_codes
+        self.metric_codes = metric_codes
+        # seconds since the epoch
+        self.timestamps = timestamps
+        self.values = values
+        self.app_names = app_names
+        self.metric_names = metric_names
+
+    def __len__(self):
+        return len(self.values)
+
+    @property
+    def start_time(self):
+        return self.timestamps.min() if len(self) > 0 else 0.0
+
+    def select(self, metric, app="*", window=None):
+        """Return a dictionary, keyed by (application, metric), of (timestamps, values)
+        arrays in time order, for the applications and metrics that match the given
+        patterns.  window is an optional (start, end) pair, in seconds from the first
+        time in the table"""
+        app_matches = numpy.array([fnmatch.fnmatchcase(name, app) for name in self.app_names], dtype=bool)
+        metric_matches = numpy.array([fnmatch.fnmatchcase(name, metric) for name in self.metric_names], dtype=bool)
+        mask = app_matches[self.app_codes] & metric_matches[self.metric_codes]
+        if window is not None:
+            relative_times = self.timestamps - self.start_time
+            mask &= (relative_times >= window[0]) & (relative_times <= window[1])
+        series = {}
+        for row in numpy.flatnonzero(mask):
+            key = (self.app_names[self.app_codes[row]], self.metric_names[self.metric_codes[row]])
+            series.setdefault(key, []).append(row)
+        for key, rows in series.items():
+            rows = numpy.array(rows)
+            rows = rows[numpy.argsort(self.timestamps[rows], kind="stable")]
+            series[key] = (self.timestamps[rows], self.values[rows])
+        return series
+
+
+def read_opmon_files(file_names):
+    app_codes = array.array("i")
+    metric_codes = array.array("i")
+    timestamps = array.array("d")
+    values = array.array("d")
+    app_index = {}
+    metric_index = {}
+    for file_name in file_names:
+        for entry in _iter_entries(file_name):
+            try:
+                timestamp = _parse_time(entry["time"])
+                origin = entry.get("origin", {})
+                app = ".".join([origin.get("application", "")] + list(origin.get("substructure", [])))
+                measurement = entry["measurement"].rsplit(".", 1)[-1]
+                data = entry["data"]
+            except (KeyError, TypeError, ValueError, AttributeError):
+                continue
+            app_code = app_index.setdefault(app, len(app_index))
+            for field, value in data.items():
+                value = _numeric_value(value)
+                if value is None:
+                    continue
+                metric_codes.append(metric_index.setdefault(f"{measurement}.{field}", len(metric_index)))
+                app_codes.append(app_code)
+                timestamps.append(timestamp)
+                values.append(value)
+    return OpmonTable(
+        _to_numpy(app_codes, numpy.int32),
+        _to_numpy(metric_codes, numpy.int32),
+        _to_numpy(timestamps, numpy.float64),
+        _to_numpy(values, numpy.float64),
+        list(app_index),
+        list(metric_index),
+    )
+
+
+def _to_numpy(column, dtype):
+    "A NumPy view of an array.array column (older NumPy versions reject empty buffers)"
+    if len(column) == 0:
+        return numpy.zeros(0, dtype=dtype)
+    return numpy.frombuffer(column, dtype=dtype)
+
+
+def _iter_entries(file_name):
+    with open(file_name) as opmon_file:
+        first_line = True
+        bad_line_number = None
+        for line_number, line in enumerate(opmon_file, start=1):
+            line = line.strip()
+            if len(line) == 0:
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                if first_line:
+                    # not one object per line, so the file is read as a whole (a list
+                    # of entries, or a single entry)
+                    yield from _read_whole_file(file_name)
+                    return
+                if bad_line_number is not None:
+                    print(f"Skipping line {bad_line_number} of {file_name}, which is not valid JSON")
+                # a bad last line is a truncated write, which ends the file
+                bad_line_number = line_number
+                continue
+            if bad_line_number is not None:
+                print(f"Skipping line {bad_line_number} of {file_name}, which is not valid JSON")
+                bad_line_number = None
+            first_line = False
+            yield entry
+
+
+def _read_whole_file(file_name):
+    with open(file_name) as opmon_file:
+        try:
+            entries = json.load(opmon_file)
+        except json.JSONDecodeError as err:
+            print(f"Skipping {file_name}, which is not valid JSON ({err})")
+            return
+    yield from (entries if isinstance(entries, list) else [entries])
+
+
+def _parse_time(time_value):
+    "Seconds since the epoch, from a number or an ISO 8601 string (with up to nanosecond precision)"
+    if isinstance(time_value, (int, float)):
+        return float(time_value)
+    time_string = time_value.replace("Z", "+00:00")
+    if "." in time_string:
+        # fromisoformat only accepts up to microseconds
+        (whole, fraction) = time_string.split(".", 1)
+        digits = len(fraction) - len(fraction.lstrip("0123456789"))
+        time_string = whole + "." + fraction[:min(digits, 6)].ljust(6, "0") + fraction[digits:]
+    date_obj = datetime.datetime.fromisoformat(time_string)
+    if date_obj.tzinfo is None:
+        date_obj = date_obj.replace(tzinfo=datetime.timezone.utc)
+    return date_obj.timestamp()
+
+
+def _numeric_value(value):
+    "The number in a data value, which is either a plain value or a {type: value} object"
+    if isinstance(value, dict):
+        if len(value) != 1:
+            return None
+        value = next(iter(value.values()))
+    if isinstance(value, bool):
+        return float(value)
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        # 64-bit integers are written as strings
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    return None
+
+
+def _describe(metric, app, window):
+    description = f"'{metric}' of applications '{app}'"
+    if window is not None:
+        description += f" between {window[0]} and {window[1]} s"
+    return description
+
+
+def _selected_series(table, metric, app, window):
+    series = table.select(metric, app, window)
+    if len(series) == 0:
+        print(f"\N{POLICE CARS REVOLVING LIGHT} No opmon values found for {_describe(metric, app, window)} \N{POLICE CARS REVOLVING LIGHT}")
+    return series
+
+
+def check_minimum_rate(table, metric, min_rate, app="*", window=None, cumulative=False):
+    """Checks that the rate of the metric is at least min_rate (per second) in every
+    publication interval.  The values are counts per interval, or, if cumulative is
+    True, running totals"""
+    series = _selected_series(table, metric, app, window)
+    passed = len(series) > 0
+    for (app_name, metric_name), (timestamps, values) in series.items():
+        if len(timestamps) < 2:
+            passed = False
+            print(f"\N{POLICE CARS REVOLVING LIGHT} Not enough values of '{metric_name}' from {app_name} to calculate a rate \N{POLICE CARS REVOLVING LIGHT}")
+            continue
+        intervals = numpy.diff(timestamps)
+        counts = numpy.diff(values) if cumulative else values[1:]
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            rates = numpy.where(intervals > 0, counts / intervals, numpy.inf)
+        lowest = rates.min()
+        if lowest < min_rate:
+            passed = False
+            print(f"\N{POLICE CARS REVOLVING LIGHT} The rate of '{metric_name}' from {app_name} fell to {lowest:.3f}/s, below the minimum of {min_rate}/s \N{POLICE CARS REVOLVING LIGHT}")
+    if passed:
+        print(f"\N{WHITE HEAVY CHECK MARK} The rate of {_describe(metric, app, window)} was always at least {min_rate}/s")
+    return passed
+
+
+def check_maximum_value(table, metric, max_value, app="*", window=None):
+    "Checks that the metric (e.g. a queue occupancy) never exceeds max_value"
+    series = _selected_series(table, metric, app, window)
+    passed = len(series) > 0
+    for (app_name, metric_name), (timestamps, values) in series.items():
+        highest = values.max()
+        if highest > max_value:
+            passed = False
+            print(f"\N{POLICE CARS REVOLVING LIGHT} '{metric_name}' from {app_name} reached {highest:g}, above the maximum of {max_value} \N{POLICE CARS REVOLVING LIGHT}")
+    if passed:
+        print(f"\N{WHITE HEAVY CHECK MARK} {_describe(metric, app, window)} never exceeded {max_value}")
+    return passed
+
+
+def check_all_zero(table, metric, app="*", window=None):
+    "Checks that the metric (e.g. a count of dropped packets) is always zero"
+    series = _selected_series(table, metric, app, window)
+    passed = len(series) > 0
+    for (app_name, metric_name), (timestamps, values) in series.items():
+        nonzero_count = numpy.count_nonzero(values)
+        if nonzero_count > 0:
+            passed = False
+            print(f"\N{POLICE CARS REVOLVING LIGHT} '{metric_name}' from {app_name} was not zero in {nonzero_count} of {len(values)} publications (maximum {values.max():g}) \N{POLICE CARS REVOLVING LIGHT}")
+    if passed:
+        print(f"\N{WHITE HEAVY CHECK MARK} {_describe(metric, app, window)} was always zero")
+    return passed
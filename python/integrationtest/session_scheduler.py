@@ -0,0 +1,49 @@
+import asyncio
+import subprocess
+from dataclasses import dataclass
+from typing import Any
+
+# 18-Oct-2026: runs several drunc sessions at the same time, as asyncio subprocesses,
+# with at most a given number running at once.  The output of each session goes to
+# its own file, so that the outputs of concurrent sessions are not interleaved.
+
+
+@dataclass
+class ScheduledSession:
+    args: list[str]
+    run_dir: Any
+    output_file: Any
+    session: str
+    config_file: Any
+    connectivity_service: Any = None
+    completed_process: subprocess.CompletedProcess = None
+
+
+async def _run_session(scheduled_session, semaphore):
+    async with semaphore:
+        with open(scheduled_session.output_file, "w") as output:
+            process = await asyncio.create_subprocess_exec(
+                *scheduled_session.args,
+                cwd=scheduled_session.run_dir,
+                stdout=output,
+                stderr=subprocess.STDOUT,
+            )
+            returncode = await process.wait()
+    scheduled_session.completed_process = subprocess.CompletedProcess(
+        scheduled_session.args, returncode
+    )
+
+
+def run_sessions(scheduled_sessions, max_concurrent_sessions):
+    """Run all of the ScheduledSessions, at most max_concurrent_sessions at a time,
+    and return when they have all finished (with their completed_process set)
+
+    """
+
+    async def run_all():
+        semaphore = asyncio.Semaphore(max_concurrent_sessions)
+        await asyncio.gather(
+            *[_run_session(s, semaphore) for s in scheduled_sessions]
+        )
+
+    asyncio.run(run_all())
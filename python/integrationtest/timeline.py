@@ -0,0 +1,87 @@
+import json
+import os
+import time
+
+# 18-Oct-2026: timelines of the phases of creating a configuration and of running a
+# DAQ session (and of the checks that are made on its results).  For each phase, the
+# wall time, the CPU time of the pytest process, and the CPU time of the subprocesses
+# that finished during the phase are recorded.
+#
+# The commands of a session (boot, conf, start, ...) are all given to a single
+# drunc-unified-shell process, which does not report when each of them starts or ends,
+# so the session is timed as one "drunc_session" phase rather than one phase per command.
+# A run can be given its own command list (e.g. just "boot conf") to time part of it.
+
+# All of the phases recorded in this pytest session, as (label, phase) pairs, for the
+# terminal summary
+session_phases = []
+
+
+class PhaseTimeline:
+    def __init__(self, label):
+        self.label = label
+        self.phases = []
+        self.json_file = None
+        self._related = {}
+
+    def start(self, name):
+        "Start timing a phase; the returned token is passed to stop()"
+        return (name, time.time(), time.perf_counter(), os.times())
+
+    def stop(self, token):
+        (name, start_time, start_counter, start_times) = token
+        end_times = os.times()
+        self.add(
+            name,
+            start_time,
+            time.perf_counter() - start_counter,
+            cpu_time=(end_times.user - start_times.user)
+            + (end_times.system - start_times.system),
+            child_cpu_time=(end_times.children_user - start_times.children_user)
+            + (end_times.children_system - start_times.children_system),
+        )
+
+    def phase(self, name):
+        "A context manager that times the block that it encloses"
+        return _Phase(self, name)
+
+    def add(self, name, start_time, wall_time, cpu_time=0.0, child_cpu_time=0.0):
+        phase = {
+            "name": name,
+            "start_time": start_time,
+            "wall_time": wall_time,
+            "cpu_time": cpu_time,
+            "child_cpu_time": child_cpu_time,
+        }
+        self.phases.append(phase)
+        session_phases.append((self.label, phase))
+
+    def save(self, json_file=None, **related_timelines):
+        """Write the timeline, and any related timelines (under their keyword), as JSON.
+        Once a file has been given, later calls without arguments rewrite it"""
+        if json_file is not None:
+            self.json_file = json_file
+            self._related = related_timelines
+        if self.json_file is None:
+            return
+        content = {"label": self.label, "phases": self.phases}
+        for key, timeline in self._related.items():
+            content[key] = {"label": timeline.label, "phases": timeline.phases}
+        with open(self.json_file, "w") as f:
+            json.dump(content, f, indent=2)
+
+
+class _Phase:
+    def __init__(self, timeline, name):
+        self.timeline = timeline
+        self.name = name
+
+    def __enter__(self):
+        self.token = self.timeline.start(self.name)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.timeline.stop(self.token)
+
+
+def slowest_phases(count):
+    return sorted(session_phases, key=lambda lp: lp[1]["wall_time"], reverse=True)[:count]
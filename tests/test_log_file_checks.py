@@ -0,0 +1,14 @@
+import integrationtest.log_file_checks as log_file_checks
+
+
+def test_inline_flags_are_not_combined():
+    assert log_file_checks._combine_patterns(["foo", "(?i)bar"]) is None
+    assert log_file_checks._combine_patterns(["foo", "(?i:bar)"]) is not None
+
+
+def test_inline_flag_in_one_exclusion_does_not_apply_to_the_others(tmp_path):
+    log_file = tmp_path / "log_app.txt"
+    log_file.write_text("x FOO warning here\n")
+
+    assert not log_file_checks.log_has_no_errors(log_file, excluded_substring_list=["foo", "(?i)bar"])
+    assert not log_file_checks.log_has_no_errors(log_file, excluded_substring_list=["foo", "(?i)bar"], use_mmap=True)
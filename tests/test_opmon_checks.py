@@ -0,0 +1,42 @@
+import json
+
+import integrationtest.opmon_checks as opmon_checks
+
+
+def _entry(time, count):
+    return {
+        "time": time,
+        "origin": {"session": "integtest", "application": "df-01", "substructure": ["dw0"]},
+        "measurement": "dunedaq.dfmodules.opmon.DataWriterInfo",
+        "data": {"records_written": {"uint8_value": str(count)}},
+    }
+
+
+def test_truncated_last_line(tmp_path):
+    opmon_file = tmp_path / "info_df-01.json"
+    lines = [json.dumps(_entry("2026-10-18T12:00:00Z", 1)), json.dumps(_entry("2026-10-18T12:00:01Z", 2))]
+    opmon_file.write_text("\n".join(lines) + "\n" + lines[0][: len(lines[0]) // 2])
+
+    table = opmon_checks.read_opmon_files([opmon_file])
+
+    assert len(table) == 2
+    assert list(table.values) == [1.0, 2.0]
+
+
+def test_bad_line_in_the_middle_is_skipped(tmp_path):
+    opmon_file = tmp_path / "info_df-01.json"
+    lines = [json.dumps(_entry("2026-10-18T12:00:00Z", 1)), "{not json", json.dumps(_entry("2026-10-18T12:00:01Z", 2))]
+    opmon_file.write_text("\n".join(lines) + "\n")
+
+    table = opmon_checks.read_opmon_files([opmon_file])
+
+    assert list(table.values) == [1.0, 2.0]
+
+
+def test_whole_file_json(tmp_path):
+    opmon_file = tmp_path / "info_df-01.json"
+    opmon_file.write_text(json.dumps([_entry("2026-10-18T12:00:00Z", 1), _entry("2026-10-18T12:00:01Z", 2)], indent=2))
+
+    table = opmon_checks.read_opmon_files([opmon_file])
+
+    assert list(table.values) == [1.0, 2.0]